@@ -1,14 +1,18 @@
 import os
 from django.core.asgi import get_asgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'exam_backend.settings')
+
+# Set up Django before importing consumers, which touch the ORM
+django_asgi_app = get_asgi_application()
+
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
 import exams.routing
 
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'project.settings')
-
 application = ProtocolTypeRouter({
-    "http": get_asgi_application(),
+    "http": django_asgi_app,
     "websocket": AuthMiddlewareStack(
         URLRouter(exams.routing.websocket_urlpatterns)
 
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -49,13 +50,138 @@ INSTALLED_APPS = [
     'exams',
     
 ]
-ASGI_APPLICATION = 'project.asgi.application'
-
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer"
+ASGI_APPLICATION = 'exam_backend.asgi.application'
+
+# Channel layer used for warning push and any other group fan-out.
+#   "memory": single process only (runserver / one ASGI worker)
+#   "local":  exams/channel_broker.py stand-in shared by workers on one
+#             machine; start it with `manage.py run_channel_broker`
+#   "redis":  channels_redis, for multi-worker / multi-node deployments
+CHANNEL_LAYER_BACKEND = os.environ.get("CHANNEL_LAYER_BACKEND", "memory")
+CHANNEL_REDIS_URL = os.environ.get("CHANNEL_REDIS_URL", "redis://127.0.0.1:6379/0")
+CHANNEL_BROKER_PORT = int(os.environ.get("CHANNEL_BROKER_PORT", 6390))
+
+if CHANNEL_LAYER_BACKEND == "redis":
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {
+                "hosts": [CHANNEL_REDIS_URL],
+                "capacity": 1500,     # per-channel backlog before messages are dropped
+                "expiry": 10,         # undelivered messages are stale after this
+            },
+        }
     }
-}
+elif CHANNEL_LAYER_BACKEND == "local":
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "exams.channel_broker.LocalBrokerChannelLayer",
+            "CONFIG": {"port": CHANNEL_BROKER_PORT},
+        }
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer"
+        }
+    }
+
+# Proctoring: detector weights, loaded lazily by exams/model_registry.py
+YOLO_MODEL_PATH = "yolo26n.pt"
+YOLO_WARM_UP_ON_START = False  # load + warm the detector when the app starts
+
+# Proctoring: detector backend (exams/detectors.py). "auto" runs *.onnx
+# weights (see `manage.py export_detector`) on ONNX Runtime, anything
+# else on ultralytics/PyTorch.
+DETECTOR_BACKEND = "auto"     # "auto", "ultralytics" or "onnx"
+DETECTOR_ONNX_PROVIDERS = ["CPUExecutionProvider"]  # or ["OpenVINOExecutionProvider"]
+DETECTOR_INTRA_OP_THREADS = 0  # 0 lets ONNX Runtime use every physical core
+DETECTOR_CONF_THRESHOLD = 0.25
+
+# Proctoring: shared YOLO inference server (exams/inference.py)
+YOLO_MAX_BATCH_SIZE = 16      # frames per batched forward pass
+YOLO_MAX_BATCH_WAIT_MS = 15   # max time a frame waits for its batch to fill
+
+# Proctoring: run detection in worker processes (exams/detection_pool.py)
+# instead of a thread. Frames travel through shared memory, one slot each.
+DETECTION_WORKERS = 0         # 0 keeps the in-process inference thread
+DETECTION_WORKER_CORES = 2    # cores each worker is pinned to
+DETECTION_POOL_SLOTS = 64     # shared-memory frame slots across all workers
+DETECTION_TIMEOUT_SECONDS = 10.0  # a sampled frame is dropped after waiting this long
+
+# Proctoring: background WarningLog writer (exams/warning_writer.py)
+WARNING_WRITER_FLUSH_INTERVAL_MS = 500
+WARNING_WRITER_MAX_BATCH = 500
+WARNING_WRITER_RETRIES = 3            # attempts per batch before it is dropped
+WARNING_WRITER_RETRY_BACKOFF_MS = 200  # grows linearly with each attempt
+
+# Proctoring: queue submissions for background grading (exams/submission_queue.py)
+ASYNC_GRADING = False
+GRADING_WORKERS = 4
+GRADING_MAX_ATTEMPTS = 3
+
+# Proctoring: per-exam question / answer-key cache (exams/question_cache.py)
+QUESTION_CACHE_SIZE = 256               # exams kept in the process-local LRU
+QUESTION_CACHE_USE_DJANGO_CACHE = False  # also share entries through CACHES["default"]
+QUESTION_CACHE_TIMEOUT = 3600
+
+# Proctoring: where frames come from (exams/frame_ingest.py)
+# "server" opens the webcam on the server (video_feed); "client" captures in
+# the browser and uploads frames over ws/proctor/<exam_id>/frames/
+PROCTORING_CAPTURE_MODE = "server"
+CLIENT_CAPTURE_FPS = 10
+CLIENT_CAPTURE_JPEG_QUALITY = 0.7
+INGEST_FRAME_WIDTH = 640
+INGEST_FRAME_HEIGHT = 480
+PROCTORING_MAX_SESSIONS = 200  # full-rate detection pipelines per node (exams/session_registry.py)
+PROCTORING_DEGRADED_FPS = 0.5  # detection ceiling for pipelines admitted past that cap
+PROCTORING_STREAM_THREADS = 32  # capture/decode threads shared by all async streams
+FRAME_RING_SLOTS = 4          # preallocated frames per session (exams/frame_ring.py)
+
+# Proctoring: adaptive detection sampling (exams/sampling.py)
+# Per-exam overrides live on Exam.min_detection_fps / max_detection_fps
+DETECTION_MIN_FPS = 0.5          # static scene
+DETECTION_MAX_FPS = 3.0          # after an alert or large scene change
+DETECTION_BACKLOG_THROTTLE = 32  # inference queue depth that triggers throttling
+
+# Proctoring: candidate self-view preview on video_feed (exams/preview.py)
+PREVIEW_ENABLED = True
+PREVIEW_WIDTH = 320         # px; frames are downscaled, detection is unaffected
+PREVIEW_JPEG_QUALITY = 60
+PREVIEW_FPS = 10
+PREVIEW_KEEPALIVE_SECONDS = 5   # blank part sent while disabled, to detect disconnects
+
+# Proctoring: invigilator live wall thumbnails (exams/live_wall.py)
+LIVE_WALL_THUMBNAIL_WIDTH = 160
+LIVE_WALL_JPEG_QUALITY = 50
+LIVE_WALL_FPS = 1.0
+
+# Proctoring: presence checks from the person boxes of each detection (exams/presence.py)
+PRESENCE_CHECKS_ENABLED = True
+PRESENCE_MIN_CONFIDENCE = 0.5
+PRESENCE_ABSENT_SECONDS = 3.0   # nobody in view this long -> "no person"
+PRESENCE_MULTIPLE_CONFIRM = 2   # consecutive detections with >1 person
+
+# Proctoring: incident tracking / de-duplication (exams/tracking.py)
+TRACKING_IOU_THRESHOLD = 0.3
+TRACKING_CONFIRM_HITS = 2        # seen in N ...
+TRACKING_WINDOW = 3              # ... of the last M sampled frames
+TRACKING_END_AFTER_SECONDS = 3.0
+
+# Proctoring: incident snapshots (exams/evidence.py), stored on disk by
+# content hash; near-duplicate crops within an attempt are stored once
+EVIDENCE_ENABLED = True
+EVIDENCE_ROOT = BASE_DIR / "evidence"
+EVIDENCE_WIDTH = 320              # snapshots are downscaled to this width
+EVIDENCE_JPEG_QUALITY = 80
+EVIDENCE_CROP_MARGIN = 0.25       # context kept around the detection box
+EVIDENCE_DEDUP_DISTANCE = 6       # max differing dHash bits for "same" image
+
+# Prometheus text metrics for the proctoring hot path, served at /metrics/
+# (exams/metrics.py). Disabled instruments return immediately.
+METRICS_ENABLED = False
+METRICS_TOKEN = ""            # when set, scrapers must send "Authorization: Bearer <token>"
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils.html import format_html, mark_safe
-from .models import Exam, Question, ExamAssignment, StudentAnswer, Result
+from .models import DetectionRule, Exam, Question, ExamAssignment, StudentAnswer, Result
 
 # We use mark_safe for static CSS to avoid the format_html error
 class ModernAdmin(admin.ModelAdmin):
@@ -14,9 +14,14 @@ class ModernAdmin(admin.ModelAdmin):
                 "input, select, textarea { border-radius: 8px !important; border: 1px solid #e2e8f0 !important; padding: 5px !important; }"
             ]
         }
+class DetectionRuleInline(admin.TabularInline):
+    model = DetectionRule
+    extra = 0
+
 @admin.register(Exam)
 class ExamAdmin(ModernAdmin):
     list_display = ('title', 'teacher', 'duration_badge', 'total_marks', 'question_count_display')
+    inlines = [DetectionRuleInline]
     
     def duration_badge(self, obj):
         return format_html('<span style="color: #64748b; font-weight: bold;">{} mins</span>', obj.duration)
@@ -1,5 +1,25 @@
+import threading
+
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ExamsConfig(AppConfig):
     name = 'exams'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+
+        # Optional dedicated warm-up so the first candidate doesn't pay
+        # the detector cold start. Off by default to keep workers light.
+        if getattr(settings, "YOLO_WARM_UP_ON_START", False):
+            if getattr(settings, "DETECTION_WORKERS", 0) > 0:
+                # Worker processes load their own copy of the weights
+                from .inference import inference_server
+
+                inference_server.start()
+                return
+
+            from .model_registry import registry
+
+            threading.Thread(target=registry.warm_up, name="yolo-warm-up", daemon=True).start()
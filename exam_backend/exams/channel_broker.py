@@ -0,0 +1,216 @@
+# ========================= IMPORTS =========================
+
+import asyncio
+import json
+import logging
+import struct
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+
+from channels.layers import BaseChannelLayer
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct("!I")
+
+
+async def _read_frame(reader):
+    (size,) = _HEADER.unpack(await reader.readexactly(_HEADER.size))
+    return json.loads(await reader.readexactly(size))
+
+
+def _write_frame(writer, payload):
+    data = json.dumps(payload, separators=(",", ":")).encode()
+    writer.write(_HEADER.pack(len(data)) + data)
+
+
+# ===========================================================
+#                  LOCAL BROKER (dev / tests only)
+# ===========================================================
+
+class ChannelBroker:
+    """
+    A small TCP message broker that lets several ASGI worker processes on
+    one machine share groups without Redis. Start it with
+    ``manage.py run_channel_broker`` and set CHANNEL_LAYER_BACKEND to
+    "local". It keeps everything in memory; production uses Redis.
+
+    Messages for a channel nobody is listening on yet are buffered (up to
+    ``capacity``, for ``expiry`` seconds). When a worker disconnects its
+    channels leave every group they joined.
+    """
+
+    def __init__(self, capacity=100, expiry=60):
+        self.capacity = capacity
+        self.expiry = expiry
+        self.groups = defaultdict(set)         # group -> channels
+        self.owners = {}                       # channel -> writer
+        self.backlog = defaultdict(lambda: deque(maxlen=self.capacity))
+
+    async def handle(self, reader, writer):
+        owned = set()
+        try:
+            while True:
+                request = await _read_frame(reader)
+                op = request["op"]
+
+                if op == "listen":
+                    channel = request["channel"]
+                    owned.add(channel)
+                    self.owners[channel] = writer
+                    self._flush(channel)
+                elif op == "send":
+                    self._deliver(request["channel"], request["message"])
+                elif op == "group_add":
+                    self.groups[request["group"]].add(request["channel"])
+                elif op == "group_discard":
+                    self.groups[request["group"]].discard(request["channel"])
+                    if not self.groups[request["group"]]:
+                        del self.groups[request["group"]]
+                elif op == "group_send":
+                    for channel in list(self.groups.get(request["group"], ())):
+                        self._deliver(channel, request["message"])
+                elif op == "flush":
+                    self.groups.clear()
+                    self.backlog.clear()
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for channel in owned:
+                self.owners.pop(channel, None)
+                self.backlog.pop(channel, None)
+                for members in self.groups.values():
+                    members.discard(channel)
+            writer.close()
+
+    def _deliver(self, channel, message):
+        writer = self.owners.get(channel)
+        if writer is not None and not writer.is_closing():
+            _write_frame(writer, {"channel": channel, "message": message})
+        else:
+            self.backlog[channel].append((time.monotonic(), message))
+
+    def _flush(self, channel):
+        pending = self.backlog.pop(channel, ())
+        cutoff = time.monotonic() - self.expiry
+        for queued_at, message in pending:
+            if queued_at >= cutoff:
+                self._deliver(channel, message)
+
+    async def serve(self, host="127.0.0.1", port=6390):
+        server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+# ===========================================================
+#                 CHANNEL LAYER FOR THE LOCAL BROKER
+# ===========================================================
+
+class _Connection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.queues = defaultdict(asyncio.Queue)   # channel -> received messages
+        self.task = asyncio.ensure_future(self._pump())
+
+    async def _pump(self):
+        try:
+            while True:
+                frame = await _read_frame(self.reader)
+                self.queues[frame["channel"]].put_nowait(frame["message"])
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+
+    async def request(self, **payload):
+        _write_frame(self.writer, payload)
+        await self.writer.drain()
+
+
+class LocalBrokerChannelLayer(BaseChannelLayer):
+    """
+    Channel layer speaking to ChannelBroker. The broker connection lives
+    on a loop owned by a daemon thread of the layer and every operation
+    is run there, so sync callers (async_to_sync, which may spin up a
+    fresh loop per call) share the one persistent connection instead of
+    opening a socket each. Messages must be JSON-serializable.
+    """
+
+    extensions = ["groups", "flush"]
+
+    def __init__(self, host="127.0.0.1", port=6390, expiry=60, capacity=100, channel_capacity=None):
+        super().__init__(expiry=expiry, capacity=capacity, channel_capacity=channel_capacity)
+        self.host = host
+        self.port = port
+        self.client_prefix = uuid.uuid4().hex
+        self._loop = None
+        self._loop_lock = threading.Lock()
+        self._conn = None
+        self._conn_lock = None
+
+    def _run(self, coro):
+        """Await ``coro`` from any loop; it runs on the connection's loop."""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="channel-broker-client", daemon=True).start()
+        return asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self._loop))
+
+    async def _connection(self):
+        # Only ever called on self._loop
+        if self._conn_lock is None:
+            self._conn_lock = asyncio.Lock()
+        async with self._conn_lock:
+            if self._conn is None or self._conn.writer.is_closing():
+                reader, writer = await asyncio.open_connection(self.host, self.port)
+                self._conn = _Connection(reader, writer)
+        return self._conn
+
+    async def _request(self, **payload):
+        connection = await self._connection()
+        await connection.request(**payload)
+
+    async def _receive(self, channel):
+        connection = await self._connection()
+        return await connection.queues[channel].get()
+
+    async def _close(self):
+        if self._conn is not None:
+            self._conn.task.cancel()
+            self._conn.writer.close()
+            self._conn = None
+
+    # ---------------- channel layer API ----------------
+
+    async def new_channel(self, prefix="specific."):
+        channel = f"{prefix.rstrip('.')}.{self.client_prefix}!{uuid.uuid4().hex}"
+        await self._run(self._request(op="listen", channel=channel))
+        return channel
+
+    async def send(self, channel, message):
+        assert self.valid_channel_name(channel)
+        await self._run(self._request(op="send", channel=channel, message=message))
+
+    async def receive(self, channel):
+        assert self.valid_channel_name(channel)
+        return await self._run(self._receive(channel))
+
+    async def group_add(self, group, channel):
+        assert self.valid_group_name(group) and self.valid_channel_name(channel)
+        await self._run(self._request(op="group_add", group=group, channel=channel))
+
+    async def group_discard(self, group, channel):
+        await self._run(self._request(op="group_discard", group=group, channel=channel))
+
+    async def group_send(self, group, message):
+        assert self.valid_group_name(group)
+        await self._run(self._request(op="group_send", group=group, message=message))
+
+    async def flush(self):
+        await self._run(self._request(op="flush"))
+
+    async def close(self):
+        await self._run(self._close())
@@ -1,13 +1,157 @@
+import asyncio
 import json
+import struct
+
+from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 
+
+def warning_group_name(student_id, exam_id):
+    # One group per attempt, so a detection only reaches that candidate's page
+    return f"warnings_{student_id}_{exam_id}"
+
+
 class WarningConsumer(AsyncWebsocketConsumer):
     async def connect(self):
-        await self.channel_layer.group_add("warnings", self.channel_name)
+        user = self.scope.get("user")
+        if user is None or not user.is_authenticated:
+            await self.close()
+            return
+
+        exam_id = self.scope["url_route"]["kwargs"]["exam_id"]
+        self.group_name = warning_group_name(user.id, exam_id)
+
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
         await self.accept()
 
     async def disconnect(self, close_code):
-        await self.channel_layer.group_discard("warnings", self.channel_name)
+        if hasattr(self, "group_name"):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
 
     async def send_warning(self, event):
-        await self.send(text_data=json.dumps(event))
+        payload = {key: value for key, value in event.items() if key != "type"}
+        await self.send(text_data=json.dumps(payload))
+
+
+class FrameIngestConsumer(AsyncWebsocketConsumer):
+    """
+    Receives compressed frames captured in the candidate's browser and
+    feeds them into the same detection pipeline as the server webcam.
+
+    Each binary message is one JPEG/WebP frame; the server answers every
+    frame with a small JSON ack so the client never has more than one
+    frame in flight.
+    """
+
+    async def connect(self):
+        user = self.scope.get("user")
+        if user is None or not user.is_authenticated or user.role != "STUDENT":
+            await self.close()
+            return
+
+        exam_id = int(self.scope["url_route"]["kwargs"]["exam_id"])
+        if not await self._has_open_attempt(user.id, exam_id):
+            await self.close()
+            return
+
+        from .frame_ingest import FrameDecoder
+        from .proctoring import ProctoringSession
+
+        from .session_registry import session_registry
+
+        self.decoder = FrameDecoder()
+        self.session = session_registry.admit(await ProctoringSession.afor_exam(user.id, exam_id), "client")
+        await self.accept()
+
+    async def disconnect(self, close_code):
+        if hasattr(self, "session"):
+            self.session.close()
+
+    async def receive(self, text_data=None, bytes_data=None):
+        if not bytes_data:
+            return
+        if not self.session.active:
+            # Another tab took over this attempt
+            await self.close()
+            return
+
+        from .proctoring import stream_executor
+
+        # Decoding and sampling block, so they run on the bounded stream
+        # pool; the detector itself is awaited without holding a thread
+        loop = asyncio.get_running_loop()
+        frame, sampled = await loop.run_in_executor(stream_executor, self._sample, bytes_data)
+        alerts = await self.session.adetect(frame) if sampled else None
+        await self.send(text_data=json.dumps({
+            "ok": frame is not None,
+            "alerts": alerts or [],
+        }))
+
+    def _sample(self, payload):
+        frame = self.decoder.decode(payload)
+        if frame is None:
+            return None, False
+        return frame, self.session.sample(frame)
+
+    async def _has_open_attempt(self, student_id, exam_id):
+        from .models import ExamAssignment
+
+        return await ExamAssignment.objects.filter(
+            student_id=student_id, exam_id=exam_id, submitted=False
+        ).aexists()
+
+
+class LiveWallConsumer(AsyncWebsocketConsumer):
+    """
+    Multiplexes thumbnails of every active session of one exam over a
+    single socket. Binary messages are an 8-byte big-endian student id
+    followed by a JPEG; text messages list sessions that ended.
+
+    Each viewer only ever sends the newest thumbnail per student, so a
+    slow connection drops frames without holding anyone else up.
+    """
+
+    async def connect(self):
+        user = self.scope.get("user")
+        if user is None or not user.is_authenticated or user.role != "TEACHER":
+            await self.close()
+            return
+
+        self.exam_id = int(self.scope["url_route"]["kwargs"]["exam_id"])
+        if not await self._owns_exam(user.id, self.exam_id):
+            await self.close()
+            return
+
+        from .live_wall import thumbnail_hub
+
+        self.hub = thumbnail_hub
+        self.hub.add_viewer(self.exam_id)
+        await self.accept()
+        self._stream_task = asyncio.ensure_future(self._stream())
+
+    async def disconnect(self, close_code):
+        if hasattr(self, "_stream_task"):
+            self._stream_task.cancel()
+            self.hub.remove_viewer(self.exam_id)
+
+    async def _stream(self):
+        seen = {}
+        while True:
+            fresh, ended = self.hub.latest(self.exam_id, seen)
+
+            for student_id, seq, jpeg in fresh:
+                await self.send(bytes_data=struct.pack("!Q", student_id) + jpeg)
+                seen[student_id] = seq
+
+            if ended:
+                for student_id in ended:
+                    del seen[student_id]
+                await self.send(text_data=json.dumps({"ended": ended}))
+
+            await asyncio.sleep(self.hub.interval)
+
+    @database_sync_to_async
+    def _owns_exam(self, teacher_id, exam_id):
+        from .models import Exam
+
+        return Exam.objects.filter(id=exam_id, teacher_id=teacher_id).exists()
@@ -0,0 +1,289 @@
+# ========================= IMPORTS =========================
+
+import atexit
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError
+
+logger = logging.getLogger(__name__)
+
+
+# ===========================================================
+#                   WORKER PROCESS (child side)
+# ===========================================================
+
+def _worker_main(index, shm_name, slot_shape, slot_count, cores, model_path,
+                 max_batch_size, tasks, results):
+    """
+    Entry point of one detection process. Frames are read straight out of
+    the shared-memory slots as NumPy views; only slot numbers and the
+    (small) detection arrays cross the queues. ``tasks`` is this worker's
+    own queue, so the parent always knows who holds which request.
+    """
+    # Pin to this worker's core budget before torch/onnxruntime spin up
+    # their thread pools, and size those pools to match
+    threads = len(cores)
+    if hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+
+    from multiprocessing import shared_memory
+
+    import numpy as np
+
+    from .detectors import backend_for
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    slots = np.ndarray((slot_count, *slot_shape), dtype=np.uint8, buffer=shm.buf)
+
+    detector = backend_for(model_path)(model_path, threads=threads)
+    results.put(("ready", index, dict(detector.names)))
+
+    try:
+        while True:
+            batch = [tasks.get()]
+            if batch[0] is None:
+                break
+            # Micro-batch whatever else is already waiting
+            stop = False
+            while len(batch) < max_batch_size:
+                try:
+                    task = tasks.get_nowait()
+                except queue.Empty:
+                    break
+                if task is None:
+                    stop = True
+                    break
+                batch.append(task)
+
+            request_ids = [request_id for request_id, _, _, _ in batch]
+
+            frames = [slots[slot, :h, :w] for _, slot, h, w in batch]
+            try:
+                detections = detector.predict(frames)
+            except Exception as exc:
+                results.put(("error", index, request_ids, repr(exc)))
+                continue
+
+            results.put((
+                "done", index,
+                [(request_id, d.cls, d.conf, d.xyxyn) for request_id, d in zip(request_ids, detections)],
+            ))
+            if stop:
+                break
+    finally:
+        del slots
+        shm.close()
+
+
+# ===========================================================
+#                SUPERVISED DETECTION POOL (parent side)
+# ===========================================================
+
+class DetectionPool:
+    """
+    Drop-in replacement for the in-process InferenceServer that spreads
+    detection over worker processes, so decoding, inference and
+    post-processing stop contending for one interpreter's GIL.
+
+    Frames are copied once into a preallocated shared-memory slot
+    (downscaled on the way in if they exceed the slot) and the slot
+    number is queued to the worker with the fewest frames in flight. A
+    supervisor thread restarts workers that die and fails every request
+    that was dispatched to them, delivered or not, so no caller and no
+    slot is left waiting. ``detect`` gives up after ``timeout`` seconds.
+    """
+
+    def __init__(self, model_path, workers=2, cores_per_worker=2, slots=64,
+                 slot_shape=(480, 640, 3), max_batch_size=16, timeout=10.0):
+        self.model_path = model_path
+        self.workers = max(1, int(workers))
+        self.cores_per_worker = max(1, int(cores_per_worker))
+        self.slot_count = max(self.workers, int(slots))
+        self.slot_shape = tuple(slot_shape)
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.timeout = timeout
+
+        self._ctx = multiprocessing.get_context("spawn")
+        self._shm = None
+        self._slots = None
+        self._free = queue.Queue()
+        self._ids = itertools.count()
+        # request_id -> (slot, future, worker index)
+        self._inflight = {}
+        self._tasks = []        # one task queue per worker
+        self._processes = []
+        self._names = None
+        self._ready = threading.Event()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._started = False
+
+    # ---------------- public API (same as InferenceServer) ----------------
+
+    def submit(self, frame):
+        """Copy the frame into a free slot and return a Future for its Detections."""
+        import cv2
+        import numpy as np
+
+        self.start()
+        try:
+            slot = self._free.get(timeout=self.timeout)   # back-pressure when every slot is in flight
+        except queue.Empty:
+            raise TimeoutError("No free detection slot") from None
+
+        max_h, max_w = self.slot_shape[:2]
+        h, w = frame.shape[:2]
+        if h > max_h or w > max_w:
+            scale = min(max_h / h, max_w / w)
+            h, w = int(h * scale), int(w * scale)
+            cv2.resize(frame, (w, h), dst=self._slots[slot, :h, :w], interpolation=cv2.INTER_AREA)
+        else:
+            np.copyto(self._slots[slot, :h, :w], frame)
+
+        future = Future()
+        request_id = next(self._ids)
+        with self._lock:
+            index = self._least_loaded()
+            self._inflight[request_id] = (slot, future, index)
+            self._tasks[index].put((request_id, slot, h, w))
+        return future
+
+    def detect(self, frame, timeout=None):
+        return self.submit(frame).result(timeout if timeout is not None else self.timeout)
+
+    def pending(self):
+        return len(self._inflight)
+
+    def class_names(self, timeout=120):
+        """Class-id -> label mapping reported by the first worker to load."""
+        self.start()
+        if not self._ready.wait(timeout):
+            raise RuntimeError("No detection worker became ready")
+        return self._names
+
+    def start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+
+        import numpy as np
+        from multiprocessing import shared_memory
+
+        size = self.slot_count * int(np.prod(self.slot_shape))
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        self._slots = np.ndarray((self.slot_count, *self.slot_shape), dtype=np.uint8, buffer=self._shm.buf)
+        for slot in range(self.slot_count):
+            self._free.put(slot)
+
+        self._results = self._ctx.Queue()
+        self._tasks = [self._ctx.Queue() for _ in range(self.workers)]
+        self._processes = [self._spawn(i) for i in range(self.workers)]
+        # Unlink the shared-memory segment even if nobody calls stop()
+        atexit.register(self.stop)
+
+        threading.Thread(target=self._collect, name="detection-results", daemon=True).start()
+        threading.Thread(target=self._supervise, name="detection-supervisor", daemon=True).start()
+
+    def stop(self):
+        if not self._started or self._stopping.is_set():
+            return
+        self._stopping.set()
+        for tasks in self._tasks:
+            tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+        self._slots = None
+        self._shm.close()
+        self._shm.unlink()
+
+    # ---------------- workers ----------------
+
+    def _cores(self, index):
+        """Consecutive core budget for worker ``index``, wrapping around the node."""
+        total = os.cpu_count() or 1
+        first = index * self.cores_per_worker
+        return {(first + i) % total for i in range(self.cores_per_worker)}
+
+    def _spawn(self, index):
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(
+                index, self._shm.name, self.slot_shape, self.slot_count, self._cores(index),
+                self.model_path, self.max_batch_size, self._tasks[index], self._results,
+            ),
+            name=f"detection-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    def _supervise(self):
+        while not self._stopping.wait(1.0):
+            for index, process in enumerate(self._processes):
+                if process.is_alive():
+                    continue
+                logger.error("Detection worker %d exited (code %s); restarting", index, process.exitcode)
+                self._fail_worker(index, RuntimeError(f"Detection worker {index} died"))
+                self._processes[index] = self._spawn(index)
+
+    def _least_loaded(self):
+        """Worker with the fewest requests in flight; caller holds the lock."""
+        load = [0] * len(self._tasks)
+        for _, _, worker in self._inflight.values():
+            load[worker] += 1
+        return load.index(min(load))
+
+    def _fail_worker(self, index, exc):
+        """Fail everything dispatched to a dead worker and give it a fresh queue."""
+        with self._lock:
+            # Tasks still sitting in the old queue died with the worker
+            self._tasks[index] = self._ctx.Queue()
+            lost = [rid for rid, (_, _, worker) in self._inflight.items() if worker == index]
+        for request_id in lost:
+            self._finish(request_id, exception=exc)
+
+    # ---------------- results ----------------
+
+    def _finish(self, request_id, result=None, exception=None):
+        with self._lock:
+            entry = self._inflight.pop(request_id, None)
+        if entry is None:
+            return
+        slot, future, _ = entry
+        self._free.put(slot)
+
+        from .metrics import DROPPED_FRAMES
+
+        # The session gave up waiting (timeout or disconnect)
+        if not future.set_running_or_notify_cancel():
+            DROPPED_FRAMES.inc("cancelled")
+            return
+        if exception is not None:
+            DROPPED_FRAMES.inc("failed")
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+
+    def _collect(self):
+        from .detectors import Detections
+
+        while True:
+            message = self._results.get()
+            kind = message[0]
+
+            if kind == "ready":
+                self._names = message[2]
+                self._ready.set()
+            elif kind == "done":
+                for request_id, cls, conf, xyxyn in message[2]:
+                    self._finish(request_id, result=Detections(cls, conf, xyxyn))
+            elif kind == "error":
+                for request_id in message[2]:
+                    self._finish(request_id, exception=RuntimeError(message[3]))
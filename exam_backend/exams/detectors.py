@@ -0,0 +1,210 @@
+# ========================= IMPORTS =========================
+
+import ast
+import os
+
+from django.conf import settings
+
+
+# ===========================================================
+#                    BACKEND-NEUTRAL RESULTS
+# ===========================================================
+
+class Detections:
+    """
+    One frame's detections as NumPy arrays, whatever backend produced
+    them: ``cls`` (int), ``conf`` (float) and ``xyxyn`` (N x 4 boxes
+    normalized to the frame size).
+    """
+
+    __slots__ = ("cls", "conf", "xyxyn")
+
+    def __init__(self, cls, conf, xyxyn):
+        self.cls = cls
+        self.conf = conf
+        self.xyxyn = xyxyn
+
+    def __len__(self):
+        return len(self.cls)
+
+
+# ===========================================================
+#                   ULTRALYTICS (PYTORCH) BACKEND
+# ===========================================================
+
+class UltralyticsDetector:
+    """The ultralytics YOLO wrapper in PyTorch eager mode (baseline)."""
+
+    @staticmethod
+    def import_backend():
+        import ultralytics  # noqa: F401
+
+    def __init__(self, path, threads=None):
+        from ultralytics import YOLO
+
+        if threads:
+            import torch
+            torch.set_num_threads(threads)
+
+        self.path = path
+        self.model = YOLO(path)
+        self.names = self.model.names
+
+    def predict(self, frames):
+        results = self.model(frames, verbose=False)
+
+        detections = []
+        for r in results:
+            boxes = r.boxes.cpu().numpy()
+            detections.append(Detections(boxes.cls.astype(int), boxes.conf, boxes.xyxyn))
+        return detections
+
+
+# ===========================================================
+#                   ONNX RUNTIME / OPENVINO BACKEND
+# ===========================================================
+
+class OnnxDetector:
+    """
+    Runs an exported (optionally INT8-quantized) YOLO ONNX model with
+    ONNX Runtime. Set DETECTOR_ONNX_PROVIDERS to
+    ["OpenVINOExecutionProvider"] to run it through OpenVINO instead.
+
+    Letterboxing is done in NumPy into preallocated buffers that are
+    reused for every batch.
+    """
+
+    @staticmethod
+    def import_backend():
+        import onnxruntime  # noqa: F401
+
+    def __init__(self, path, threads=None, providers=None, conf_threshold=None, iou_threshold=0.45):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads if threads is not None else getattr(settings, "DETECTOR_INTRA_OP_THREADS", 0)
+        options.inter_op_num_threads = 1
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        self.path = path
+        self.session = ort.InferenceSession(
+            path,
+            sess_options=options,
+            providers=providers or getattr(settings, "DETECTOR_ONNX_PROVIDERS", ["CPUExecutionProvider"]),
+        )
+        self.input_name = self.session.get_inputs()[0].name
+        self.conf_threshold = conf_threshold or getattr(settings, "DETECTOR_CONF_THRESHOLD", 0.25)
+        self.iou_threshold = iou_threshold
+
+        # ultralytics stores class names and image size in the model metadata
+        meta = self.session.get_modelmeta().custom_metadata_map
+        self.names = ast.literal_eval(meta["names"]) if "names" in meta else {}
+        imgsz = ast.literal_eval(meta["imgsz"]) if "imgsz" in meta else [640, 640]
+        self.input_h, self.input_w = (imgsz, imgsz) if isinstance(imgsz, int) else imgsz
+
+        self._canvas = None   # uint8 letterbox canvases, (batch, H, W, 3)
+        self._input = None    # float32 model input, (batch, 3, H, W)
+
+    # ---------------- preprocessing ----------------
+
+    def _buffers(self, batch):
+        import numpy as np
+
+        if self._input is None or self._input.shape[0] < batch:
+            self._canvas = np.empty((batch, self.input_h, self.input_w, 3), dtype=np.uint8)
+            self._input = np.empty((batch, 3, self.input_h, self.input_w), dtype=np.float32)
+        return self._canvas[:batch], self._input[:batch]
+
+    def letterbox(self, frames):
+        """
+        Fill the shared input buffer; returns it plus each frame's
+        (scale, pad_x, pad_y, width, height) for mapping boxes back.
+        """
+        import cv2
+        import numpy as np
+
+        canvas, blob = self._buffers(len(frames))
+        canvas.fill(114)
+        geometry = []
+
+        for i, frame in enumerate(frames):
+            h, w = frame.shape[:2]
+            scale = min(self.input_w / w, self.input_h / h)
+            new_w, new_h = int(round(w * scale)), int(round(h * scale))
+            pad_x, pad_y = (self.input_w - new_w) // 2, (self.input_h - new_h) // 2
+
+            cv2.resize(
+                frame, (new_w, new_h),
+                dst=canvas[i, pad_y:pad_y + new_h, pad_x:pad_x + new_w],
+                interpolation=cv2.INTER_LINEAR,
+            )
+            geometry.append((scale, pad_x, pad_y, w, h))
+
+        # HWC BGR uint8 -> CHW RGB float32 in [0, 1], written in place
+        np.multiply(canvas[..., ::-1].transpose(0, 3, 1, 2), 1 / 255.0, out=blob, casting="unsafe")
+        return blob, geometry
+
+    # ---------------- inference ----------------
+
+    def predict(self, frames):
+        from .metrics import PREPROCESS_SECONDS
+
+        with PREPROCESS_SECONDS.time("letterbox"):
+            blob, geometry = self.letterbox(frames)
+        output = self.session.run(None, {self.input_name: blob})[0]
+        return [self._decode(output[i], *geometry[i]) for i in range(len(frames))]
+
+    def _decode(self, pred, scale, pad_x, pad_y, width, height):
+        import cv2
+        import numpy as np
+
+        if pred.shape[-1] == 6:
+            # End-to-end export (YOLO26): (max_det, 6) = x1, y1, x2, y2, conf, cls
+            pred = pred[pred[:, 4] >= self.conf_threshold]
+            boxes, conf, cls = pred[:, :4], pred[:, 4], pred[:, 5].astype(int)
+        else:
+            # Raw head: (4 + num_classes, anchors) with cx, cy, w, h; needs NMS
+            pred = pred.T
+            scores = pred[:, 4:]
+            cls = scores.argmax(1)
+            conf = scores[np.arange(len(cls)), cls]
+            keep = conf >= self.conf_threshold
+            pred, cls, conf = pred[keep], cls[keep], conf[keep]
+
+            boxes = np.empty((len(pred), 4), dtype=np.float32)
+            boxes[:, 0] = pred[:, 0] - pred[:, 2] / 2
+            boxes[:, 1] = pred[:, 1] - pred[:, 3] / 2
+            boxes[:, 2] = pred[:, 0] + pred[:, 2] / 2
+            boxes[:, 3] = pred[:, 1] + pred[:, 3] / 2
+
+            # Class-aware NMS: offset boxes per class so they never overlap
+            offset = boxes + (cls[:, None] * 4096.0)
+            nms_boxes = np.column_stack((offset[:, :2], offset[:, 2:] - offset[:, :2]))
+            keep = cv2.dnn.NMSBoxes(nms_boxes.tolist(), conf.tolist(), self.conf_threshold, self.iou_threshold)
+            keep = np.array(keep, dtype=int).reshape(-1)
+            boxes, conf, cls = boxes[keep], conf[keep], cls[keep]
+
+        # Undo the letterbox and normalize to the original frame
+        xyxyn = np.empty_like(boxes, dtype=np.float32)
+        xyxyn[:, [0, 2]] = ((boxes[:, [0, 2]] - pad_x) / scale / width).clip(0, 1)
+        xyxyn[:, [1, 3]] = ((boxes[:, [1, 3]] - pad_y) / scale / height).clip(0, 1)
+        return Detections(cls, conf.astype(np.float32), xyxyn)
+
+
+# ===========================================================
+#                        BACKEND SELECTION
+# ===========================================================
+
+BACKENDS = {
+    "ultralytics": UltralyticsDetector,
+    "onnx": OnnxDetector,
+}
+
+
+def backend_for(path):
+    """DETECTOR_BACKEND, or "auto" to pick by weights file extension."""
+    backend = getattr(settings, "DETECTOR_BACKEND", "auto")
+    if backend == "auto":
+        backend = "onnx" if os.path.splitext(str(path))[1].lower() == ".onnx" else "ultralytics"
+    return BACKENDS[backend]
@@ -0,0 +1,154 @@
+# ========================= IMPORTS =========================
+
+import hashlib
+import logging
+import os
+import queue
+import re
+import threading
+from collections import deque
+
+from django.conf import settings
+
+from .metrics import JPEG_ENCODE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+DIGEST_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+# ===========================================================
+#                     PERCEPTUAL HASH
+# ===========================================================
+
+def dhash(image, size=8):
+    """64-bit difference hash: near-identical crops differ in only a few bits."""
+    import cv2
+    import numpy as np
+
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+# ===========================================================
+#                 CONTENT-ADDRESSED EVIDENCE STORE
+# ===========================================================
+
+class EvidenceStore:
+    """
+    Keeps one downscaled JPEG snapshot per incident on disk, named by its
+    SHA-256 and sharded as ``ab/cd/<digest>.jpg``; the WarningLog row only
+    stores the digest.
+
+    The frame loop just crops the detection (a small copy, so the ring
+    slot can be reused) and queues it. A background thread downscales,
+    hashes and writes it, reusing the previous snapshot of the same
+    attempt when the perceptual hash is within ``dedup_distance`` bits,
+    then hands the digest to the warning writer.
+    """
+
+    def __init__(self, root, width=320, quality=80, margin=0.25, dedup_distance=6, recent=32):
+        self.root = str(root)
+        self.width = int(width)
+        self.quality = int(quality)
+        self.margin = float(margin)
+        self.dedup_distance = int(dedup_distance)
+        self.recent = int(recent)
+
+        # (student_id, exam_id) -> deque of (phash, digest)
+        self._seen = {}
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    # ---------------- public API ----------------
+
+    def capture(self, student_id, exam_id, incident_key, frame, box=None):
+        """
+        Queue a snapshot of ``frame`` for an incident. ``box`` is a
+        normalized (x1, y1, x2, y2); None keeps the whole frame.
+        """
+        h, w = frame.shape[:2]
+        if box is not None:
+            x1, y1, x2, y2 = box
+            mx, my = (x2 - x1) * self.margin, (y2 - y1) * self.margin
+            left, right = int(max(0.0, x1 - mx) * w), int(min(1.0, x2 + mx) * w)
+            top, bottom = int(max(0.0, y1 - my) * h), int(min(1.0, y2 + my) * h)
+            if right > left and bottom > top:
+                frame = frame[top:bottom, left:right]
+
+        self.start()
+        self._queue.put((student_id, exam_id, incident_key, frame.copy()))
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[:2], digest[2:4], f"{digest}.jpg")
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="evidence-store", daemon=True)
+                self._thread.start()
+
+    def end_session(self, student_id, exam_id):
+        self._seen.pop((student_id, exam_id), None)
+
+    # ---------------- worker loop ----------------
+
+    def _run(self):
+        from .warning_writer import warning_writer
+
+        while True:
+            student_id, exam_id, incident_key, crop = self._queue.get()
+            try:
+                digest = self.store(student_id, exam_id, crop)
+            except Exception:
+                logger.exception("Could not store evidence for incident %s", incident_key)
+                continue
+            warning_writer.attach_evidence(incident_key, digest)
+
+    def store(self, student_id, exam_id, crop):
+        """Write (or reuse) the snapshot for one crop and return its digest."""
+        import cv2
+
+        h, w = crop.shape[:2]
+        if w > self.width:
+            crop = cv2.resize(crop, (self.width, max(1, h * self.width // w)), interpolation=cv2.INTER_AREA)
+
+        phash = dhash(crop)
+        seen = self._seen.setdefault((student_id, exam_id), deque(maxlen=self.recent))
+        for other, digest in seen:
+            if (phash ^ other).bit_count() <= self.dedup_distance:
+                return digest
+
+        with JPEG_ENCODE_SECONDS.time("evidence"):
+            ok, jpeg = cv2.imencode(".jpg", crop, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            raise ValueError("JPEG encoding failed")
+        data = jpeg.tobytes()
+        digest = hashlib.sha256(data).hexdigest()
+
+        path = self.path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so readers never see a partial file
+            tmp = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp, path)
+
+        seen.append((phash, digest))
+        return digest
+
+
+evidence_store = EvidenceStore(
+    getattr(settings, "EVIDENCE_ROOT", os.path.join(settings.BASE_DIR, "evidence")),
+    width=getattr(settings, "EVIDENCE_WIDTH", 320),
+    quality=getattr(settings, "EVIDENCE_JPEG_QUALITY", 80),
+    margin=getattr(settings, "EVIDENCE_CROP_MARGIN", 0.25),
+    dedup_distance=getattr(settings, "EVIDENCE_DEDUP_DISTANCE", 6),
+)
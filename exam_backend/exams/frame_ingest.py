@@ -0,0 +1,46 @@
+# ========================= IMPORTS =========================
+
+from django.conf import settings
+
+from .frame_ring import FrameRing
+from .metrics import DROPPED_FRAMES, PREPROCESS_SECONDS
+
+
+# ===========================================================
+#                  BROWSER FRAME DECODING
+# ===========================================================
+
+class FrameDecoder:
+    """
+    Decodes JPEG/WebP frames uploaded by the browser into the session's
+    FrameRing at the ingest size, so readers always see a fixed set of
+    frame slots no matter how many frames a session receives.
+
+    The OpenCV Python binding cannot decode into a caller's buffer, so
+    each frame is still decoded into a temporary array and then either
+    resized into the claimed slot or copied in by ``publish``.
+    """
+
+    def __init__(self, width=None, height=None, ring=None):
+        self.width = width or getattr(settings, "INGEST_FRAME_WIDTH", 640)
+        self.height = height or getattr(settings, "INGEST_FRAME_HEIGHT", 480)
+        self.ring = ring or FrameRing(shape=(self.height, self.width, 3))
+
+    def decode(self, payload):
+        """Returns the decoded frame (a ring slot), or None for an undecodable payload."""
+        import cv2
+        import numpy as np
+
+        with PREPROCESS_SECONDS.time("decode"):
+            # frombuffer wraps the websocket payload without copying it
+            decoded = cv2.imdecode(np.frombuffer(payload, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if decoded is None:
+                DROPPED_FRAMES.inc("undecodable")
+                return None
+
+            seq, slot = self.ring.claim()
+            if slot is not None and slot.shape != decoded.shape:
+                cv2.resize(decoded, (self.width, self.height), dst=slot, interpolation=cv2.INTER_AREA)
+                decoded = slot
+            _, frame = self.ring.publish(seq, decoded)
+        return frame
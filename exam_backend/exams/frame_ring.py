@@ -0,0 +1,63 @@
+# ========================= IMPORTS =========================
+
+from django.conf import settings
+
+
+# ===========================================================
+#                 PER-SESSION FRAME RING BUFFER
+# ===========================================================
+
+class FrameRing:
+    """
+    A fixed number of preallocated frame slots, written round-robin and
+    stamped with increasing sequence numbers.
+
+    The producer (webcam capture or browser decode) writes straight into
+    the next slot; detection, preview, live-wall thumbnails and evidence
+    crops all run on the published slot as a view instead of copying it.
+    They run in step with the producer, and anything kept past the frame
+    (evidence crops, pool submissions) is copied, so a view is only ever
+    read before the ring comes back around to its slot.
+    """
+
+    def __init__(self, slots=None, shape=None):
+        self.slots = max(2, int(slots or getattr(settings, "FRAME_RING_SLOTS", 4)))
+        self.buffer = None
+        self.latest_seq = -1
+        if shape is not None:
+            self._allocate(shape)
+
+    def _allocate(self, shape):
+        import numpy as np
+
+        self.buffer = np.empty((self.slots, *shape), dtype=np.uint8)
+
+    # ---------------- producer ----------------
+
+    def claim(self):
+        """
+        ``(seq, slot)`` for the next frame; ``slot`` is None until the
+        frame shape is known (the first publish allocates the ring).
+        """
+        seq = self.latest_seq + 1
+        if self.buffer is None:
+            return seq, None
+        return seq, self.buffer[seq % self.slots]
+
+    def publish(self, seq, frame):
+        """
+        Publish frame ``seq``. ``frame`` is normally the
+        claimed slot itself (filled in place); anything else is copied in.
+        Returns ``(seq, view)``.
+        """
+        import numpy as np
+
+        if self.buffer is None or self.buffer.shape[1:] != frame.shape:
+            self._allocate(frame.shape)
+
+        slot = self.buffer[seq % self.slots]
+        if frame is not slot and not np.shares_memory(frame, slot):
+            np.copyto(slot, frame)
+
+        self.latest_seq = seq
+        return seq, slot
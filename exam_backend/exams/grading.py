@@ -0,0 +1,66 @@
+# ========================= IMPORTS =========================
+
+from django.db import transaction
+
+from .models import ExamAssignment, Result, StudentAnswer
+from .question_cache import get_exam_questions
+
+
+# ===========================================================
+#                     SUBMISSION GRADING
+# ===========================================================
+
+def grade_submission(assignment, answers):
+    """
+    Grade and persist one attempt.
+
+    ``answers`` maps ``str(question_id)`` to the selected option, i.e. the
+    submitted POST data. The answer key comes from the question cache; answers,
+    the Result and the assignment update are committed together. Returns
+    the new Result, or None if the attempt was already submitted.
+    """
+    score = 0
+    total_marks = 0
+    rows = []
+
+    for question_id, correct_option, marks in get_exam_questions(assignment.exam).answer_key:
+        selected = answers.get(str(question_id)) or ""
+        total_marks += marks
+        if selected == correct_option:
+            score += marks
+
+        rows.append(StudentAnswer(
+            exam_id=assignment.exam_id,
+            question_id=question_id,
+            student_id=assignment.student_id,
+            selected_option=selected,
+        ))
+
+    with transaction.atomic():
+        # Lock the attempt so a double submit can't grade it twice
+        locked = (
+            ExamAssignment.objects
+            .select_for_update()
+            .filter(pk=assignment.pk, submitted=False)
+            .first()
+        )
+        if locked is None:
+            return None
+
+        StudentAnswer.objects.bulk_create(rows)
+        result = Result.objects.create(
+            exam_id=assignment.exam_id,
+            student_id=assignment.student_id,
+            score=score,
+            total_marks=total_marks,
+            is_terminated=locked.warning_limit_reached,
+        )
+
+        # Only touch these columns so concurrent warning_count increments
+        # from the writer are never overwritten.
+        ExamAssignment.objects.filter(pk=assignment.pk).update(
+            submitted=True,
+            terminated=locked.warning_limit_reached,
+        )
+
+    return result
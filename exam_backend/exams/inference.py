@@ -0,0 +1,137 @@
+# ========================= IMPORTS =========================
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+
+from .metrics import DROPPED_FRAMES, INFERENCE_BATCH_SIZE, INFERENCE_SECONDS
+from .model_registry import registry
+
+
+# ===========================================================
+#                   SHARED INFERENCE SERVER
+# ===========================================================
+
+class InferenceServer:
+    """
+    Collects frames from every active proctoring session into
+    micro-batches and runs one batched forward pass per tick.
+
+    A batch is closed as soon as it holds ``max_batch_size`` frames or
+    ``max_wait_ms`` has passed since its first frame arrived, whichever
+    comes first.
+    """
+
+    def __init__(self, predict, names, max_batch_size=16, max_wait_ms=15):
+        # ``predict`` takes a list of frames and returns one result per frame;
+        # ``names`` returns the detector's class-id -> label mapping
+        self.predict = predict
+        self.names = names
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0, max_wait_ms) / 1000.0
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    # ---------------- public API ----------------
+
+    def submit(self, frame):
+        """Queue a frame and return a Future resolving to its Results."""
+        self.start()
+        future = Future()
+        self._queue.put((frame, future))
+        return future
+
+    def detect(self, frame, timeout=None):
+        """Blocking helper used by the frame loops."""
+        return self.submit(frame).result(timeout)
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def class_names(self):
+        return self.names()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="yolo-inference", daemon=True
+                )
+                self._thread.start()
+
+    # ---------------- worker loop ----------------
+
+    def _collect_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+
+            # Drop frames whose session gave up waiting
+            collected = len(batch)
+            batch = [(f, fut) for f, fut in batch if fut.set_running_or_notify_cancel()]
+            if len(batch) < collected:
+                DROPPED_FRAMES.inc("cancelled", amount=collected - len(batch))
+            if not batch:
+                continue
+
+            frames = [frame for frame, _ in batch]
+            INFERENCE_BATCH_SIZE.observe(len(frames))
+            try:
+                with INFERENCE_SECONDS.time():
+                    results = self.predict(frames)
+            except Exception as exc:
+                DROPPED_FRAMES.inc("failed", amount=len(batch))
+                for _, future in batch:
+                    future.set_exception(exc)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+
+
+# The detector is loaded by the registry on the first proctoring frame,
+# so dashboard-only workers never import torch/ultralytics.
+# One batched forward pass per tick for every active proctoring session,
+# either on a thread in this process or on a pool of worker processes.
+if getattr(settings, "DETECTION_WORKERS", 0) > 0:
+    from .detection_pool import DetectionPool
+
+    inference_server = DetectionPool(
+        registry.default_path(),
+        workers=settings.DETECTION_WORKERS,
+        cores_per_worker=getattr(settings, "DETECTION_WORKER_CORES", 2),
+        slots=getattr(settings, "DETECTION_POOL_SLOTS", 64),
+        slot_shape=(
+            getattr(settings, "INGEST_FRAME_HEIGHT", 480),
+            getattr(settings, "INGEST_FRAME_WIDTH", 640),
+            3,
+        ),
+        max_batch_size=getattr(settings, "YOLO_MAX_BATCH_SIZE", 16),
+        timeout=getattr(settings, "DETECTION_TIMEOUT_SECONDS", 10.0),
+    )
+else:
+    inference_server = InferenceServer(
+        registry.predict,
+        lambda: registry.get().names,
+        max_batch_size=getattr(settings, "YOLO_MAX_BATCH_SIZE", 16),
+        max_wait_ms=getattr(settings, "YOLO_MAX_BATCH_WAIT_MS", 15),
+    )
@@ -0,0 +1,109 @@
+# ========================= IMPORTS =========================
+
+import itertools
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+from .metrics import JPEG_ENCODE_SECONDS
+
+
+# ===========================================================
+#                 INVIGILATOR LIVE-WALL THUMBNAILS
+# ===========================================================
+
+class ThumbnailHub:
+    """
+    Latest low-resolution thumbnail of every active proctoring session,
+    grouped by exam, for the invigilator live wall.
+
+    Sessions publish the frames they already hold for detection; nothing
+    is re-captured, and nothing is encoded for an exam nobody is watching.
+    Only the newest thumbnail per session is kept, so viewers that fall
+    behind skip frames instead of slowing the producers down.
+    """
+
+    def __init__(self, width=160, quality=50, fps=1.0):
+        self.width = width
+        self.quality = quality
+        self.interval = 1.0 / max(0.1, fps)
+
+        self._lock = threading.Lock()
+        self._frames = {}          # exam_id -> {student_id: (seq, jpeg)}
+        self._last_encoded = {}    # (exam_id, student_id) -> monotonic time
+        self._viewers = Counter()  # exam_id -> open live-wall sockets
+        self._seq = itertools.count(1)
+
+    # ---------------- viewers ----------------
+
+    def add_viewer(self, exam_id):
+        with self._lock:
+            self._viewers[exam_id] += 1
+
+    def remove_viewer(self, exam_id):
+        with self._lock:
+            self._viewers[exam_id] -= 1
+            if self._viewers[exam_id] <= 0:
+                del self._viewers[exam_id]
+                self._frames.pop(exam_id, None)
+
+    def has_viewers(self, exam_id):
+        return self._viewers.get(exam_id, 0) > 0
+
+    def latest(self, exam_id, seen):
+        """
+        Thumbnails newer than ``seen`` ({student_id: seq}) as
+        [(student_id, seq, jpeg), ...] plus the ids of ended sessions.
+        """
+        with self._lock:
+            frames = dict(self._frames.get(exam_id, {}))
+
+        fresh = [
+            (student_id, seq, jpeg)
+            for student_id, (seq, jpeg) in frames.items()
+            if seen.get(student_id, 0) < seq
+        ]
+        ended = [student_id for student_id in seen if student_id not in frames]
+        return fresh, ended
+
+    # ---------------- producers ----------------
+
+    def publish(self, exam_id, student_id, frame, now=None):
+        if not self.has_viewers(exam_id):
+            return
+
+        now = now or time.monotonic()
+        key = (exam_id, student_id)
+        if now - self._last_encoded.get(key, 0.0) < self.interval:
+            return
+        self._last_encoded[key] = now
+
+        import cv2
+
+        height, width = frame.shape[:2]
+        size = (self.width, max(1, height * self.width // width))
+        thumb = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+        with JPEG_ENCODE_SECONDS.time("thumbnail"):
+            ok, jpeg = cv2.imencode('.jpg', thumb, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+        if not ok:
+            return
+
+        with self._lock:
+            if exam_id in self._viewers:
+                self._frames.setdefault(exam_id, {})[student_id] = (next(self._seq), jpeg.tobytes())
+
+    def end_session(self, exam_id, student_id):
+        with self._lock:
+            self._last_encoded.pop((exam_id, student_id), None)
+            frames = self._frames.get(exam_id)
+            if frames:
+                frames.pop(student_id, None)
+
+
+thumbnail_hub = ThumbnailHub(
+    width=getattr(settings, "LIVE_WALL_THUMBNAIL_WIDTH", 160),
+    quality=getattr(settings, "LIVE_WALL_JPEG_QUALITY", 50),
+    fps=getattr(settings, "LIVE_WALL_FPS", 1.0),
+)
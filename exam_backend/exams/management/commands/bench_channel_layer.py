@@ -0,0 +1,110 @@
+import asyncio
+import statistics
+import threading
+import time
+
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+def build_layer(backend):
+    """A fresh layer instance; None uses the configured CHANNEL_LAYERS."""
+    if backend == "memory":
+        from channels.layers import InMemoryChannelLayer
+        return InMemoryChannelLayer()
+    if backend == "local":
+        from exams.channel_broker import LocalBrokerChannelLayer
+        return LocalBrokerChannelLayer(port=settings.CHANNEL_BROKER_PORT)
+    if backend == "redis":
+        from channels_redis.core import RedisChannelLayer
+        return RedisChannelLayer(hosts=[settings.CHANNEL_REDIS_URL], capacity=1500)
+    return get_channel_layer()
+
+
+def start_broker(port):
+    """Run a ChannelBroker on its own loop in a daemon thread."""
+    from exams.channel_broker import ChannelBroker
+
+    thread = threading.Thread(
+        target=lambda: asyncio.run(ChannelBroker().serve("127.0.0.1", port)),
+        name="channel-broker", daemon=True,
+    )
+    thread.start()
+    time.sleep(0.2)
+
+
+class Command(BaseCommand):
+    help = "Measure channel-layer fan-out latency and throughput for many subscribed exam sessions."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--backend", choices=["memory", "local", "redis"], default=None,
+                            help="Layer to test (defaults to CHANNEL_LAYERS)")
+        parser.add_argument("--sessions", type=int, default=1000, help="Subscribed candidate sockets")
+        parser.add_argument("--rounds", type=int, default=20, help="Messages sent to every session")
+        parser.add_argument("--mode", choices=["per-session", "broadcast"], default="per-session",
+                            help="One group per session (warning push) or one exam-wide group")
+        parser.add_argument("--start-broker", action="store_true", help="Start a local broker in-process first")
+
+    def handle(self, *args, **options):
+        if options["start_broker"]:
+            start_broker(settings.CHANNEL_BROKER_PORT)
+
+        layer = build_layer(options["backend"])
+        latencies, elapsed, delivered = asyncio.run(
+            self._run(layer, options["sessions"], options["rounds"], options["mode"])
+        )
+
+        latencies.sort()
+
+        def pct(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+        self.stdout.write(f"Layer: {type(layer).__module__}.{type(layer).__name__}")
+        self.stdout.write(f"Sessions: {options['sessions']}, mode {options['mode']}, {options['rounds']} round(s)")
+        self.stdout.write(f"  Delivered      {delivered} messages in {elapsed:.2f} s")
+        self.stdout.write(f"  Throughput     {delivered / elapsed:,.0f} msg/s")
+        self.stdout.write(
+            f"  Latency        p50 {pct(0.5):.2f} ms, p95 {pct(0.95):.2f} ms, "
+            f"p99 {pct(0.99):.2f} ms, mean {statistics.fmean(latencies) * 1000:.2f} ms"
+        )
+
+    async def _run(self, layer, sessions, rounds, mode):
+        channels = [await layer.new_channel() for _ in range(sessions)]
+        if mode == "broadcast":
+            groups = ["bench_exam"]
+            for channel in channels:
+                await layer.group_add("bench_exam", channel)
+        else:
+            groups = [f"bench_warnings_{i}" for i in range(sessions)]
+            for group, channel in zip(groups, channels):
+                await layer.group_add(group, channel)
+
+        latencies = []
+
+        async def subscriber(channel):
+            for _ in range(rounds):
+                message = await layer.receive(channel)
+                latencies.append(time.perf_counter() - message["sent"])
+
+        listeners = [asyncio.ensure_future(subscriber(channel)) for channel in channels]
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for group in groups:
+                # Shaped like the warning writer's push
+                await layer.group_send(group, {
+                    "type": "send_warning",
+                    "warnings": [{"object_name": "cell phone", "warning_type": "Cell phone detected!"}],
+                    "total_count": 1,
+                    "should_submit": False,
+                    "sent": time.perf_counter(),
+                })
+        await asyncio.gather(*listeners)
+        elapsed = time.perf_counter() - start
+
+        for group, channel in zip(groups * sessions if mode == "broadcast" else groups, channels):
+            await layer.group_discard(group, channel)
+        if hasattr(layer, "close"):
+            await layer.close()
+        return latencies, elapsed, len(latencies)
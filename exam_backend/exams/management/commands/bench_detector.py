@@ -0,0 +1,83 @@
+import glob
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from exams.detectors import OnnxDetector, UltralyticsDetector
+
+
+def load_frames(images, count, width, height):
+    """Frames from an image folder, or synthetic noise frames without one."""
+    import cv2
+    import numpy as np
+
+    if images:
+        paths = sorted(glob.glob(os.path.join(images, "*.jpg")) + glob.glob(os.path.join(images, "*.png")))
+        frames = [cv2.imread(p) for p in paths[:count]]
+        frames = [f for f in frames if f is not None]
+        if not frames:
+            raise CommandError(f"No readable images in {images}")
+        return frames
+
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 255, (height, width, 3), dtype=np.uint8) for _ in range(count)]
+
+
+def agreement(baseline, candidate, iou_threshold=0.5):
+    """Share of baseline boxes matched by a same-class candidate box."""
+    from exams.tracking import iou
+
+    matched = total = 0
+    for ref, got in zip(baseline, candidate):
+        total += len(ref)
+        used = set()
+        for cls, box in zip(ref.cls, ref.xyxyn):
+            for j, (other_cls, other_box) in enumerate(zip(got.cls, got.xyxyn)):
+                if j not in used and other_cls == cls and iou(box, other_box) >= iou_threshold:
+                    used.add(j)
+                    matched += 1
+                    break
+    return matched / total if total else 1.0
+
+
+class Command(BaseCommand):
+    help = "Compare the ONNX Runtime detector with the PyTorch baseline: FPS per core and detection agreement."
+
+    def add_arguments(self, parser):
+        parser.add_argument("onnx", help="Exported .onnx weights (see export_detector)")
+        parser.add_argument("--baseline", default="yolo26n.pt", help="PyTorch weights to compare against")
+        parser.add_argument("--images", default=None, help="Folder of sample frames (synthetic if omitted)")
+        parser.add_argument("--frames", type=int, default=50)
+        parser.add_argument("--batch", type=int, default=1)
+        parser.add_argument("--threads", type=int, default=0, help="ONNX intra-op threads (0 = all cores)")
+        parser.add_argument("--width", type=int, default=640)
+        parser.add_argument("--height", type=int, default=480)
+
+    def handle(self, *args, **options):
+        frames = load_frames(options["images"], options["frames"], options["width"], options["height"])
+        cores = options["threads"] or os.cpu_count()
+
+        baseline = UltralyticsDetector(options["baseline"])
+        candidate = OnnxDetector(options["onnx"], threads=options["threads"])
+
+        base_out, base_fps = self._run(baseline, frames, options["batch"])
+        onnx_out, onnx_fps = self._run(candidate, frames, options["batch"])
+
+        self.stdout.write(f"Frames: {len(frames)}, batch {options['batch']}, {cores} core(s)")
+        self.stdout.write(f"  PyTorch     {base_fps:7.1f} FPS  ({base_fps / cores:.2f} FPS/core)")
+        self.stdout.write(f"  ONNX        {onnx_fps:7.1f} FPS  ({onnx_fps / cores:.2f} FPS/core)")
+        self.stdout.write(f"  Speed-up    {onnx_fps / base_fps:.2f}x")
+        self.stdout.write(f"  Agreement   {agreement(base_out, onnx_out) * 100:.1f}% of baseline boxes (same class, IoU >= 0.5)")
+
+    @staticmethod
+    def _run(detector, frames, batch):
+        # One untimed pass so lazy initialisation doesn't skew the numbers
+        detector.predict(frames[:batch])
+
+        outputs = []
+        start = time.perf_counter()
+        for i in range(0, len(frames), batch):
+            outputs.extend(detector.predict(frames[i:i + batch]))
+        elapsed = time.perf_counter() - start
+        return outputs, len(frames) / elapsed
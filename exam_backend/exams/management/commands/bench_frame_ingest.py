@@ -0,0 +1,80 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+
+from exams.frame_ingest import FrameDecoder
+
+
+def synthetic_frames(count, width, height, fmt, quality):
+    """Encoded frames of a moving rectangle over sensor-like noise."""
+    import cv2
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    params = [cv2.IMWRITE_WEBP_QUALITY if fmt == "webp" else cv2.IMWRITE_JPEG_QUALITY, quality]
+    frames = []
+    for i in range(count):
+        frame = rng.integers(90, 110, (height, width, 3), dtype=np.uint8)
+        x = (i * 7) % (width - 120)
+        cv2.rectangle(frame, (x, height // 3), (x + 120, height // 3 + 200), (40, 40, 40), -1)
+        ok, buf = cv2.imencode(f".{fmt}", frame, params)
+        frames.append(buf.tobytes())
+    return frames
+
+
+class Command(BaseCommand):
+    help = "Synthetic load generator for browser frame ingestion (decode, optionally detect)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sessions", type=int, default=8, help="Concurrent simulated candidates")
+        parser.add_argument("--frames", type=int, default=200, help="Frames sent per session")
+        parser.add_argument("--width", type=int, default=640)
+        parser.add_argument("--height", type=int, default=480)
+        parser.add_argument("--format", choices=["jpg", "webp"], default="jpg")
+        parser.add_argument("--quality", type=int, default=70)
+        parser.add_argument("--detect", action="store_true", help="Also run each frame through ProctoringSession")
+
+    def handle(self, *args, **options):
+        payloads = synthetic_frames(32, options["width"], options["height"], options["format"], options["quality"])
+        avg_kb = sum(map(len, payloads)) / len(payloads) / 1024
+        self.stdout.write(f"Synthetic {options['format']} frames: {avg_kb:.1f} KB average")
+
+        def candidate(index):
+            decoder = FrameDecoder(options["width"], options["height"])
+            session = None
+            if options["detect"]:
+                from exams.proctoring import ProctoringSession
+                from exams.sampling import AdaptiveSampler
+                # Detect on every frame, but never write warnings or evidence:
+                # no rules, and no presence checks (synthetic frames have nobody in them)
+                session = ProctoringSession(
+                    None, None,
+                    sampler=AdaptiveSampler(min_fps=1000, max_fps=1000),
+                    rules=[],
+                )
+                session.presence = None
+                session.evidence = False
+
+            try:
+                for i in range(options["frames"]):
+                    frame = decoder.decode(payloads[(i + index) % len(payloads)])
+                    if session is not None:
+                        session.process(frame)
+            finally:
+                if session is not None:
+                    session.close()
+
+        threads = [threading.Thread(target=candidate, args=(i,)) for i in range(options["sessions"])]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+        total = options["sessions"] * options["frames"]
+        self.stdout.write(
+            f"{options['sessions']} sessions x {options['frames']} frames: "
+            f"{total / elapsed:.1f} frames/s, {total * avg_kb / 1024 / elapsed:.1f} MB/s ingested"
+        )
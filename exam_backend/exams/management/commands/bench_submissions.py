@@ -0,0 +1,90 @@
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from exams.grading import grade_submission
+from exams.models import Exam, ExamAssignment, Question, Result, StudentAnswer
+from users.models import User
+
+
+def legacy_submit(assignment, answers):
+    """The previous per-question create() loop, kept for comparison."""
+    score = total_marks = 0
+    for q in Question.objects.filter(exam_id=assignment.exam_id):
+        selected = answers.get(str(q.id))
+        total_marks += q.marks
+        if selected == q.correct_option:
+            score += q.marks
+        StudentAnswer.objects.create(
+            exam_id=assignment.exam_id,
+            question=q,
+            student_id=assignment.student_id,
+            selected_option=selected if selected else "",
+        )
+    Result.objects.create(
+        exam_id=assignment.exam_id,
+        student_id=assignment.student_id,
+        score=score,
+        total_marks=total_marks,
+    )
+    ExamAssignment.objects.filter(pk=assignment.pk).update(submitted=True)
+
+
+class Command(BaseCommand):
+    help = "Measure exam submissions per second for several exam sizes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--questions", type=int, nargs="+", default=[50, 100, 500])
+        parser.add_argument("--submissions", type=int, default=50, help="Submissions per exam size")
+        parser.add_argument("--legacy", action="store_true", help="Also time the old per-question INSERT loop")
+
+    def handle(self, *args, **options):
+        tag = uuid.uuid4().hex[:8]
+        teacher = User.objects.create_user(username=f"bench-teacher-{tag}", password="x", role="TEACHER")
+        students = [
+            User(username=f"bench-student-{tag}-{i}", role="STUDENT")
+            for i in range(options["submissions"])
+        ]
+        User.objects.bulk_create(students)
+        students = list(User.objects.filter(username__startswith=f"bench-student-{tag}-"))
+
+        modes = [("bulk", grade_submission)]
+        if options["legacy"]:
+            modes.append(("legacy", legacy_submit))
+
+        try:
+            for n in options["questions"]:
+                for label, submit in modes:
+                    rate = self._run(teacher, students, n, submit)
+                    self.stdout.write(f"{n:>4} questions  {label:<6} {rate:8.1f} submissions/s")
+        finally:
+            Exam.objects.filter(teacher=teacher).delete()
+            User.objects.filter(username__startswith=f"bench-student-{tag}-").delete()
+            teacher.delete()
+
+    def _run(self, teacher, students, n_questions, submit):
+        with transaction.atomic():
+            exam = Exam.objects.create(teacher=teacher, title="bench", duration=60, total_marks=n_questions)
+            Question.objects.bulk_create([
+                Question(
+                    exam=exam, question_text=f"Q{i}",
+                    option_a="a", option_b="b", option_c="c", option_d="d",
+                    correct_option="A", marks=1,
+                )
+                for i in range(n_questions)
+            ])
+            ExamAssignment.objects.bulk_create([ExamAssignment(exam=exam, student=s) for s in students])
+
+        question_ids = list(exam.questions.values_list("id", flat=True))
+        answers = {str(qid): "AB"[i % 2] for i, qid in enumerate(question_ids)}
+        assignments = list(ExamAssignment.objects.filter(exam=exam))
+
+        start = time.perf_counter()
+        for assignment in assignments:
+            submit(assignment, answers)
+        elapsed = time.perf_counter() - start
+
+        exam.delete()
+        return len(assignments) / elapsed
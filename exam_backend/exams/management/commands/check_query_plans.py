@@ -0,0 +1,52 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from exams.models import ExamAssignment, Result, StudentAnswer, WarningLog
+
+# A plan line that reads the whole table instead of using an index
+FULL_SCAN = {
+    "sqlite": re.compile(r"\bSCAN (exams_\w+)(?! USING)"),
+    "postgresql": re.compile(r"Seq Scan on (exams_\w+)"),
+}
+
+
+def hot_queries():
+    """The per-(student, exam) lookups issued by the proctoring views."""
+    return {
+        "attempt_exam: assignment": ExamAssignment.objects.filter(exam_id=1, student_id=1),
+        "attempt_exam: recent warnings": (
+            WarningLog.objects.filter(student_id=1, exam_id=1).order_by("-timestamp")[:10]
+        ),
+        "all_integrity_logs: timeline": (
+            WarningLog.objects.filter(student_id=1, exam_id=1).order_by("timestamp")
+        ),
+        "student_result: latest result": (
+            Result.objects.filter(exam_id=1, student_id=1).order_by("-id")[:1]
+        ),
+        "submission: answers": StudentAnswer.objects.filter(exam_id=1, student_id=1),
+    }
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN the proctoring hot-path queries and fail if any falls back to a full table scan."
+
+    def handle(self, *args, **options):
+        pattern = FULL_SCAN.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(f"No plan checks defined for database vendor '{connection.vendor}'")
+
+        failures = []
+        for name, queryset in hot_queries().items():
+            plan = queryset.explain()
+            self.stdout.write(f"-- {name}\n{plan}\n")
+
+            scanned = pattern.findall(plan)
+            if scanned:
+                failures.append(f"{name}: full scan of {', '.join(sorted(set(scanned)))}")
+
+        if failures:
+            raise CommandError("Unindexed hot queries:\n  " + "\n  ".join(failures))
+
+        self.stdout.write(self.style.SUCCESS("All hot queries use an index."))
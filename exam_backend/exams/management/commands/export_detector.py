@@ -0,0 +1,39 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Export the proctoring detector to ONNX (optionally INT8-quantized) for the CPU backend."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--model", default=None, help="PyTorch weights (defaults to YOLO_MODEL_PATH)")
+        parser.add_argument("--size", type=int, default=640, help="Square input size baked into the graph")
+        parser.add_argument("--batch", type=int, default=0, help="Fixed batch size; 0 exports a dynamic batch axis")
+        parser.add_argument("--int8", action="store_true", help="Also write a dynamically quantized INT8 copy")
+
+    def handle(self, *args, **options):
+        try:
+            from ultralytics import YOLO
+        except ImportError:
+            raise CommandError("Exporting needs ultralytics installed.")
+
+        model = YOLO(options["model"] or getattr(settings, "YOLO_MODEL_PATH", "yolo26n.pt"))
+        path = model.export(
+            format="onnx",
+            imgsz=options["size"],
+            dynamic=options["batch"] == 0,
+            batch=options["batch"] or 1,
+            simplify=True,
+        )
+        self.stdout.write(f"FP32 ONNX: {path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+        if options["int8"]:
+            from onnxruntime.quantization import QuantType, quantize_dynamic
+
+            int8_path = path.replace(".onnx", "-int8.onnx")
+            quantize_dynamic(path, int8_path, weight_type=QuantType.QUInt8)
+            self.stdout.write(f"INT8 ONNX: {int8_path} ({os.path.getsize(int8_path) / 1e6:.1f} MB)")
+
+        self.stdout.write("Point YOLO_MODEL_PATH at the .onnx file and check it with `manage.py bench_detector`.")
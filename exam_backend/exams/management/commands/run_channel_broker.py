@@ -0,0 +1,24 @@
+import asyncio
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from exams.channel_broker import ChannelBroker
+
+
+class Command(BaseCommand):
+    help = "Run the local channel-layer broker so several ASGI workers can share groups without Redis."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=getattr(settings, "CHANNEL_BROKER_PORT", 6390))
+        parser.add_argument("--capacity", type=int, default=100, help="Buffered messages per idle channel")
+        parser.add_argument("--expiry", type=int, default=60, help="Seconds a buffered message stays deliverable")
+
+    def handle(self, *args, **options):
+        broker = ChannelBroker(capacity=options["capacity"], expiry=options["expiry"])
+        self.stdout.write(f"Channel broker listening on {options['host']}:{options['port']}")
+        try:
+            asyncio.run(broker.serve(options["host"], options["port"]))
+        except KeyboardInterrupt:
+            pass
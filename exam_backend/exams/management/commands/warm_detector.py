@@ -0,0 +1,35 @@
+import resource
+import time
+
+from django.core.management.base import BaseCommand
+
+from exams.model_registry import registry
+
+
+class Command(BaseCommand):
+    help = "Load the proctoring detector and report cold-start vs warm latency and RSS."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--model", default=None, help="Weights path (defaults to YOLO_MODEL_PATH)")
+        parser.add_argument("--runs", type=int, default=10, help="Warm inference runs to average")
+        parser.add_argument("--size", type=int, default=640, help="Square test frame size")
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"RSS before load: {self._rss_mb():.1f} MB")
+
+        start = time.perf_counter()
+        registry.warm_up(options["model"], size=options["size"])
+        self.stdout.write(f"Cold start (import + load + first pass): {(time.perf_counter() - start) * 1000:.0f} ms")
+
+        import numpy as np
+        frame = np.zeros((options["size"], options["size"], 3), dtype=np.uint8)
+        for _ in range(options["runs"]):
+            registry.predict([frame], options["model"])
+        for key, value in registry.stats(options["model"]).items():
+            self.stdout.write(f"  {key}: {value}")
+        self.stdout.write(f"RSS after load: {self._rss_mb():.1f} MB")
+
+    @staticmethod
+    def _rss_mb():
+        # ru_maxrss is reported in kilobytes on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
@@ -0,0 +1,248 @@
+# ========================= IMPORTS =========================
+
+import bisect
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+# ===========================================================
+#                 MINIMAL PROMETHEUS INSTRUMENTS
+# ===========================================================
+
+class _NullTimer:
+    """Shared no-op context manager handed out while metrics are disabled."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+        return False
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, registry, name, help, labelnames=()):
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _label_text(self, values, extra=None):
+        pairs = list(zip(self.labelnames, values))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+        return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values = {}
+
+    def inc(self, *labels, amount=1):
+        if not self.registry.enabled:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def _samples(self):
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{self._label_text(k)} {v}" for k, v in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+    def __init__(self, *args, buckets=DEFAULT_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(buckets)
+        # labels -> [bucket counts..., +Inf count, sum]
+        self._values = {}
+
+    def observe(self, value, *labels):
+        if not self.registry.enabled:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(labels)
+            if counts is None:
+                counts = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    def time(self, *labels):
+        """Context manager observing the elapsed wall time of its block."""
+        if not self.registry.enabled:
+            return _NULL_TIMER
+        return _Timer(self, labels)
+
+    def _samples(self):
+        with self._lock:
+            values = {k: list(v) for k, v in self._values.items()}
+
+        lines = []
+        for labels, counts in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts[:-1]):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{self._label_text(labels, ('le', bound))} {cumulative}")
+            lines.append(f"{self.name}_sum{self._label_text(labels)} {counts[-1]}")
+            lines.append(f"{self.name}_count{self._label_text(labels)} {cumulative}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Read on scrape from ``callback``, which returns {labels tuple: value}."""
+
+    kind = "gauge"
+
+    def __init__(self, *args, callback, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.callback = callback
+
+    def _samples(self):
+        try:
+            values = self.callback()
+        except Exception:
+            # One broken gauge must not fail the whole scrape
+            logger.exception("Metric %s callback failed", self.name)
+            return []
+        return [f"{self.name}{self._label_text(k)} {v}" for k, v in sorted(values.items())]
+
+
+class MetricsRegistry:
+    """
+    Holds the proctoring instruments and renders them in the Prometheus
+    text format. While disabled every instrument returns immediately, so
+    the hot path pays one attribute check per call.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._metrics = []
+
+    def counter(self, name, help, labelnames=()):
+        return self._add(Counter(self, name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), **kwargs):
+        return self._add(Histogram(self, name, help, labelnames, **kwargs))
+
+    def gauge(self, name, help, callback, labelnames=()):
+        return self._add(Gauge(self, name, help, labelnames, callback=callback))
+
+    def _add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry(enabled=getattr(settings, "METRICS_ENABLED", False))
+
+
+# ===========================================================
+#                  PROCTORING HOT-PATH METRICS
+# ===========================================================
+
+CAPTURE_SECONDS = metrics.histogram(
+    "proctoring_capture_seconds", "Time to read one webcam frame into the ring buffer."
+)
+PREPROCESS_SECONDS = metrics.histogram(
+    "proctoring_preprocess_seconds", "Per-frame preprocessing time.", ["stage"]
+)
+INFERENCE_SECONDS = metrics.histogram(
+    "proctoring_inference_seconds", "Detector forward pass per micro-batch (in-process server)."
+)
+INFERENCE_BATCH_SIZE = metrics.histogram(
+    "proctoring_inference_batch_size", "Frames per detector micro-batch.",
+    buckets=(1, 2, 4, 8, 16, 32, 64),
+)
+DETECTION_WAIT_SECONDS = metrics.histogram(
+    "proctoring_detection_wait_seconds", "Submit-to-result time for a sampled frame, queueing included."
+)
+JPEG_ENCODE_SECONDS = metrics.histogram(
+    "proctoring_jpeg_encode_seconds", "JPEG encoding time.", ["kind"]
+)
+WARNING_WRITE_SECONDS = metrics.histogram(
+    "proctoring_warninglog_write_seconds", "Time to commit one batch of WarningLog rows and aggregates."
+)
+DETECTIONS = metrics.counter(
+    "proctoring_detections_total", "Detections that passed the exam policy.", ["object"]
+)
+WARNINGS_WRITTEN = metrics.counter(
+    "proctoring_warnings_written_total", "WarningLog rows inserted."
+)
+FRAMES = metrics.counter(
+    "proctoring_frames_total", "Frames received by proctoring sessions.", ["source"]
+)
+DROPPED_FRAMES = metrics.counter(
+    "proctoring_dropped_frames_total", "Frames that never produced a detection result.", ["reason"]
+)
+
+
+def _session_counts():
+    from .session_registry import session_registry
+
+    state = session_registry.snapshot()
+    return {("full",): state["active"] - state["degraded"], ("degraded",): state["degraded"]}
+
+
+def _queue_depths():
+    from .evidence import evidence_store
+    from .inference import inference_server
+    from .submission_queue import grading_queue
+    from .warning_writer import warning_writer
+
+    return {
+        ("inference",): inference_server.pending(),
+        ("warning_writer",): warning_writer.pending(),
+        ("evidence",): evidence_store.pending(),
+        ("grading",): grading_queue.pending(),
+    }
+
+
+metrics.gauge("proctoring_active_sessions", "Detection pipelines on this node.", _session_counts, ["mode"])
+metrics.gauge("proctoring_queue_depth", "Items waiting in background queues.", _queue_depths, ["queue"])
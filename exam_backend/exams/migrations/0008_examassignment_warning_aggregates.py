@@ -0,0 +1,87 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Min
+
+
+def backfill_aggregates(apps, schema_editor):
+    ExamAssignment = apps.get_model('exams', 'ExamAssignment')
+    WarningClassCount = apps.get_model('exams', 'WarningClassCount')
+    WarningLog = apps.get_model('exams', 'WarningLog')
+
+    assignments = {
+        (a.student_id, a.exam_id): a
+        for a in ExamAssignment.objects.all()
+    }
+
+    rows = (
+        WarningLog.objects
+        .values('student_id', 'exam_id', 'object_name')
+        .annotate(count=Count('id'), first_seen=Min('timestamp'), last_seen=Max('timestamp'))
+    )
+
+    # warning_count was kept by read-modify-write saves that could race;
+    # every warning weighed 1 so far, so recount it from the logs
+    for assignment in assignments.values():
+        assignment.warning_count = 0
+
+    class_counts = []
+    for row in rows:
+        assignment = assignments.get((row['student_id'], row['exam_id']))
+        if assignment is None:
+            continue
+
+        assignment.warning_count += row['count']
+        class_counts.append(WarningClassCount(
+            assignment=assignment,
+            object_name=row['object_name'],
+            count=row['count'],
+            first_seen=row['first_seen'],
+            last_seen=row['last_seen'],
+        ))
+
+        if assignment.first_warning_at is None or row['first_seen'] < assignment.first_warning_at:
+            assignment.first_warning_at = row['first_seen']
+        if assignment.last_warning_at is None or row['last_seen'] > assignment.last_warning_at:
+            assignment.last_warning_at = row['last_seen']
+
+    WarningClassCount.objects.bulk_create(class_counts)
+    ExamAssignment.objects.bulk_update(
+        list(assignments.values()),
+        ['warning_count', 'first_warning_at', 'last_warning_at'],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0007_warninglog'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='examassignment',
+            name='first_warning_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='examassignment',
+            name='last_warning_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='WarningClassCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_name', models.CharField(max_length=100)),
+                ('count', models.IntegerField(default=0)),
+                ('first_seen', models.DateTimeField()),
+                ('last_seen', models.DateTimeField()),
+                ('assignment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='class_counts', to='exams.examassignment')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('assignment', 'object_name'), name='unique_warning_class_per_assignment')],
+            },
+        ),
+        migrations.RunPython(backfill_aggregates, migrations.RunPython.noop),
+    ]
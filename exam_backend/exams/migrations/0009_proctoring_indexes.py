@@ -0,0 +1,75 @@
+import logging
+
+from django.db import migrations, models
+
+logger = logging.getLogger(__name__)
+
+
+def _dedupe(model, fields, ordering, conflicting=(), details=()):
+    """Keep the first row per ``fields`` group under ``ordering``; delete the rest.
+
+    Every deleted row is logged along with ``details``. If a duplicate
+    disagrees with the kept row on any of ``conflicting``, nothing is deleted
+    and the migration fails so the rows can be resolved by hand.
+    """
+    kept = {}
+    duplicates = []
+    conflicts = []
+    for row in model.objects.order_by(*ordering).values("id", *fields, *conflicting, *details):
+        key = tuple(row[f] for f in fields)
+        first = kept.setdefault(key, row)
+        if first is row:
+            continue
+        duplicates.append(row)
+        if any(row[f] != first[f] for f in conflicting):
+            conflicts.append((first, row))
+    if conflicts:
+        raise RuntimeError(
+            "Cannot add the %s unique constraint: these duplicate rows disagree on %s. "
+            "Resolve them manually, then re-run the migration: %s"
+            % (model.__name__, ", ".join(conflicting),
+               "; ".join("kept %r vs %r" % pair for pair in conflicts))
+        )
+    for row in duplicates:
+        logger.warning("Deleting duplicate %s %r (kept id %s)",
+                       model.__name__, row, kept[tuple(row[f] for f in fields)]["id"])
+    if duplicates:
+        model.objects.filter(id__in=[row["id"] for row in duplicates]).delete()
+
+
+def remove_duplicates(apps, schema_editor):
+    # Prefer the submitted assignment, and the latest result/answer. Results
+    # are grades: duplicates are only dropped when they match the kept row.
+    # Deleting an assignment cascades to its WarningClassCount rows.
+    _dedupe(apps.get_model("exams", "Result"), ["exam_id", "student_id"], ["-id"],
+            conflicting=["score", "total_marks", "is_terminated"])
+    _dedupe(apps.get_model("exams", "ExamAssignment"), ["exam_id", "student_id"], ["-submitted", "id"],
+            details=["submitted", "warning_count"])
+    _dedupe(apps.get_model("exams", "StudentAnswer"), ["exam_id", "student_id", "question_id"], ["-id"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0008_examassignment_warning_aggregates'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='examassignment',
+            constraint=models.UniqueConstraint(fields=('exam', 'student'), name='unique_assignment_per_student'),
+        ),
+        migrations.AddConstraint(
+            model_name='studentanswer',
+            constraint=models.UniqueConstraint(fields=('exam', 'student', 'question'), name='unique_answer_per_question'),
+        ),
+        migrations.AddConstraint(
+            model_name='result',
+            constraint=models.UniqueConstraint(fields=('exam', 'student'), name='unique_result_per_student'),
+        ),
+        migrations.AddIndex(
+            model_name='warninglog',
+            index=models.Index(fields=['student', 'exam', '-timestamp'], name='warninglog_session_recent_idx'),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0010_submissionjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exam',
+            name='question_version',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0011_exam_question_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='exam',
+            name='min_detection_fps',
+            field=models.FloatField(blank=True, help_text='Detections per second for a static scene', null=True),
+        ),
+        migrations.AddField(
+            model_name='exam',
+            name='max_detection_fps',
+            field=models.FloatField(blank=True, help_text='Detections per second after an alert or scene change', null=True),
+        ),
+    ]
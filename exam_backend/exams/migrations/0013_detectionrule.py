@@ -0,0 +1,27 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0012_exam_detection_fps'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DetectionRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_name', models.CharField(help_text="Detector class name, e.g. 'cell phone'", max_length=100)),
+                ('min_confidence', models.FloatField(default=0.4)),
+                ('min_box_area', models.FloatField(default=0.0, help_text='Fraction of the frame (0-1)')),
+                ('cooldown_seconds', models.FloatField(default=2.0)),
+                ('severity', models.PositiveIntegerField(default=1, help_text='Warnings counted per alert')),
+                ('exam', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='detection_rules', to='exams.exam')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('exam', 'object_name'), name='unique_detection_rule_per_class')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0013_detectionrule'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='warninglog',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='warninglog',
+            name='incident_key',
+            field=models.CharField(blank=True, db_index=True, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='warninglog',
+            name='ended_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='warninglog',
+            name='peak_confidence',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('exams', '0014_warninglog_incidents'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='warninglog',
+            name='evidence',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
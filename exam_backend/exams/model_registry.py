@@ -0,0 +1,123 @@
+# ========================= IMPORTS =========================
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+from .detectors import backend_for
+
+logger = logging.getLogger(__name__)
+
+
+# ===========================================================
+#                     LAZY MODEL REGISTRY
+# ===========================================================
+
+class _ModelEntry:
+    def __init__(self, detector, import_seconds, load_seconds):
+        self.detector = detector
+        self.import_seconds = import_seconds
+        self.load_seconds = load_seconds
+        self.cold_inference_seconds = None   # first forward pass
+        self.warm_inference_seconds = None   # moving average afterwards
+        self.inference_calls = 0
+
+
+class ModelRegistry:
+    """
+    Loads detector weights on first use instead of at import time, so
+    dashboard-only workers and manage.py commands never pay for torch.
+    The backend (ultralytics or ONNX Runtime, see exams/detectors.py)
+    follows DETECTOR_BACKEND or the weights file extension.
+
+    Every load and forward pass is timed, which lets ``stats()`` report
+    cold-start versus warm latency.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def default_path(self):
+        return getattr(settings, "YOLO_MODEL_PATH", "yolo26n.pt")
+
+    def is_loaded(self, path=None):
+        return (path or self.default_path()) in self._entries
+
+    def _entry(self, path=None):
+        path = path or self.default_path()
+        entry = self._entries.get(path)
+        if entry is not None:
+            return entry
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                backend = backend_for(path)
+                start = time.perf_counter()
+                backend.import_backend()
+                imported = time.perf_counter()
+                detector = backend(path)
+                loaded = time.perf_counter()
+
+                entry = _ModelEntry(detector, imported - start, loaded - imported)
+                self._entries[path] = entry
+                logger.info(
+                    "Loaded %s detector %s (import %.0f ms, weights %.0f ms)",
+                    backend.__name__, path, entry.import_seconds * 1000, entry.load_seconds * 1000,
+                )
+        return entry
+
+    def get(self, path=None):
+        """The loaded detector; exposes ``names`` and ``predict(frames)``."""
+        return self._entry(path).detector
+
+    def predict(self, frames, path=None):
+        entry = self._entry(path)
+
+        start = time.perf_counter()
+        results = entry.detector.predict(frames)
+        elapsed = time.perf_counter() - start
+
+        entry.inference_calls += 1
+        if entry.cold_inference_seconds is None:
+            entry.cold_inference_seconds = elapsed
+            logger.info("Detector cold inference %.0f ms", elapsed * 1000)
+        elif entry.warm_inference_seconds is None:
+            entry.warm_inference_seconds = elapsed
+        else:
+            entry.warm_inference_seconds += 0.1 * (elapsed - entry.warm_inference_seconds)
+
+        return results
+
+    def warm_up(self, path=None, size=640):
+        """Load the weights and push one blank frame through the model."""
+        import numpy as np
+
+        self.predict([np.zeros((size, size, 3), dtype=np.uint8)], path)
+        return self.stats(path)
+
+    def stats(self, path=None):
+        path = path or self.default_path()
+        entry = self._entries.get(path)
+        if entry is None:
+            return {"model": path, "loaded": False}
+
+        def ms(value):
+            return round(value * 1000, 2) if value is not None else None
+
+        return {
+            "model": path,
+            "loaded": True,
+            "backend": type(entry.detector).__name__,
+            "import_ms": ms(entry.import_seconds),
+            "load_ms": ms(entry.load_seconds),
+            "cold_inference_ms": ms(entry.cold_inference_seconds),
+            "warm_inference_ms": ms(entry.warm_inference_seconds),
+            "inference_calls": entry.inference_calls,
+        }
+
+
+registry = ModelRegistry()
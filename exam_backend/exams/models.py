@@ -1,7 +1,12 @@
 from django.db import models
+from django.utils import timezone
 from users.models import User
 
 
+# Warnings after which an attempt is auto-submitted and flagged as terminated
+MAX_WARNINGS = 10
+
+
 # ===========================================================
 #                           EXAM
 # ===========================================================
@@ -17,6 +22,19 @@ class Exam(models.Model):
     total_marks = models.IntegerField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Bumped whenever a question changes; part of the question cache key
+    question_version = models.IntegerField(default=0)
+
+    # Adaptive detection sampling bounds (blank = site-wide default)
+    min_detection_fps = models.FloatField(
+        null=True, blank=True,
+        help_text="Detections per second for a static scene"
+    )
+    max_detection_fps = models.FloatField(
+        null=True, blank=True,
+        help_text="Detections per second after an alert or scene change"
+    )
+
     def __str__(self):
         return self.title
 
@@ -49,6 +67,37 @@ class Question(models.Model):
         return self.question_text[:50]
 
 
+# ===========================================================
+#                  PROCTORING POLICY RULES
+# ===========================================================
+
+class DetectionRule(models.Model):
+    """One alerting class of an exam's proctoring policy (see exams/policy.py)."""
+
+    exam = models.ForeignKey(
+        Exam,
+        on_delete=models.CASCADE,
+        related_name="detection_rules"
+    )
+    object_name = models.CharField(max_length=100, help_text="Detector class name, e.g. 'cell phone'")
+
+    min_confidence = models.FloatField(default=0.4)
+    min_box_area = models.FloatField(default=0.0, help_text="Fraction of the frame (0-1)")
+    cooldown_seconds = models.FloatField(default=2.0)
+    severity = models.PositiveIntegerField(default=1, help_text="Warnings counted per alert")
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["exam", "object_name"],
+                name="unique_detection_rule_per_class",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.exam} - {self.object_name}"
+
+
 # ===========================================================
 #                     EXAM ASSIGNMENT
 # ===========================================================
@@ -66,12 +115,57 @@ class ExamAssignment(models.Model):
     submitted = models.BooleanField(default=False)
     terminated = models.BooleanField(default=False)
 
+    # Denormalized warning aggregates, maintained with F() updates by
+    # exams/warning_writer.py. Polling and termination checks read these
+    # instead of counting WarningLog rows.
     warning_count = models.IntegerField(default=0)
+    first_warning_at = models.DateTimeField(null=True, blank=True)
+    last_warning_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["exam", "student"],
+                name="unique_assignment_per_student",
+            ),
+        ]
+
+    @property
+    def warning_limit_reached(self):
+        return self.warning_count >= MAX_WARNINGS
 
     def __str__(self):
         return f"{self.exam} -> {self.student}"
 
 
+# ===========================================================
+#               PER-CLASS WARNING AGGREGATES
+# ===========================================================
+
+class WarningClassCount(models.Model):
+    assignment = models.ForeignKey(
+        ExamAssignment,
+        on_delete=models.CASCADE,
+        related_name="class_counts"
+    )
+    object_name = models.CharField(max_length=100)
+
+    count = models.IntegerField(default=0)
+    first_seen = models.DateTimeField()
+    last_seen = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["assignment", "object_name"],
+                name="unique_warning_class_per_assignment",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.assignment} - {self.object_name} x{self.count}"
+
+
 # ===========================================================
 #                     STUDENT ANSWERS
 # ===========================================================
@@ -83,6 +177,14 @@ class StudentAnswer(models.Model):
 
     selected_option = models.CharField(max_length=1)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["exam", "student", "question"],
+                name="unique_answer_per_question",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.student} - Question {self.question.id}"
 
@@ -100,6 +202,14 @@ class Result(models.Model):
 
     is_terminated = models.BooleanField(default=False)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["exam", "student"],
+                name="unique_result_per_student",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.student} - {self.exam}"
 
@@ -113,9 +223,65 @@ class WarningLog(models.Model):
     exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name="warning_logs", null=True, blank=True)
     object_name = models.CharField(max_length=100)
     warning_type = models.CharField(max_length=255)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Detection time (incident start), set by the writer rather than on insert
+    timestamp = models.DateTimeField(default=timezone.now)
+
+    # Tracked incidents (exams/tracking.py): one row per continuous sighting
+    incident_key = models.CharField(max_length=32, blank=True, db_index=True)
+    ended_at = models.DateTimeField(null=True, blank=True)
+    peak_confidence = models.FloatField(null=True, blank=True)
+
+    # SHA-256 of the JPEG snapshot in the evidence store (exams/evidence.py)
+    evidence = models.CharField(max_length=64, blank=True)
+
+    class Meta:
+        indexes = [
+            # Recent warnings for one attempt (polling, timelines, exports)
+            models.Index(
+                fields=["student", "exam", "-timestamp"],
+                name="warninglog_session_recent_idx",
+            ),
+        ]
 
     def __str__(self):
         # Safer version to prevent 'NoneType' errors
         student_name = self.student.username if self.student else "Unknown Student"
-        return f"{student_name} - {self.warning_type} ({self.timestamp.strftime('%H:%M:%S')})"
\ No newline at end of file
+        return f"{student_name} - {self.warning_type} ({self.timestamp.strftime('%H:%M:%S')})"
+
+# ===========================================================
+#                    QUEUED SUBMISSIONS
+# ===========================================================
+
+class SubmissionJob(models.Model):
+    STATUS_CHOICES = (
+        ("PENDING", "Pending"),
+        ("PROCESSING", "Processing"),
+        ("DONE", "Done"),
+        ("FAILED", "Failed"),
+    )
+
+    # Generated when the exam page is rendered, so resubmitting the same
+    # page maps onto the same job instead of grading twice
+    idempotency_key = models.CharField(max_length=64, unique=True)
+    assignment = models.ForeignKey(
+        ExamAssignment,
+        on_delete=models.CASCADE,
+        related_name="submission_jobs"
+    )
+    answers = models.JSONField(default=dict)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="PENDING")
+    attempts = models.IntegerField(default=0)
+    result = models.ForeignKey(Result, on_delete=models.SET_NULL, null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "updated_at"], name="submissionjob_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.assignment} [{self.status}]"
@@ -0,0 +1,112 @@
+# ========================= IMPORTS =========================
+
+from django.conf import settings
+
+
+# Used when an exam has no DetectionRule rows of its own
+DEFAULT_RULES = [
+    {"object_name": "cell phone", "min_confidence": 0.4, "min_box_area": 0.0, "cooldown_seconds": 2.0, "severity": 1},
+    {"object_name": "book", "min_confidence": 0.4, "min_box_area": 0.0, "cooldown_seconds": 2.0, "severity": 1},
+    {"object_name": "notebook", "min_confidence": 0.4, "min_box_area": 0.0, "cooldown_seconds": 2.0, "severity": 1},
+]
+
+RULE_FIELDS = ("object_name", "min_confidence", "min_box_area", "cooldown_seconds", "severity")
+
+
+def load_rules(exam_id):
+    """The exam's rules as plain dicts, falling back to the site defaults."""
+    from .models import DetectionRule
+
+    rules = list(DetectionRule.objects.filter(exam_id=exam_id).values(*RULE_FIELDS))
+    return rules or getattr(settings, "PROCTORING_DEFAULT_RULES", DEFAULT_RULES)
+
+
+async def aload_rules(exam_id):
+    """``load_rules`` using the async ORM."""
+    from .models import DetectionRule
+
+    rules = [rule async for rule in DetectionRule.objects.filter(exam_id=exam_id).values(*RULE_FIELDS)]
+    return rules or getattr(settings, "PROCTORING_DEFAULT_RULES", DEFAULT_RULES)
+
+
+# ===========================================================
+#                 COMPILED DETECTION POLICY
+# ===========================================================
+
+class CompiledPolicy:
+    """
+    A proctoring policy compiled against the detector's class list into
+    per-class-id lookup vectors, so each frame is filtered with a handful
+    of NumPy operations instead of a Python loop over boxes.
+
+    Compile once per session; the per-class cooldowns are applied by the
+    session's IncidentTracker.
+    """
+
+    def __init__(self, rules, names):
+        import numpy as np
+
+        # model.names is {class_id: name}
+        ids = {name: class_id for class_id, name in dict(names).items()}
+        size = max(ids.values(), default=-1) + 1
+
+        self.labels = [""] * size
+        for name, class_id in ids.items():
+            self.labels[class_id] = name
+
+        self.enabled = np.zeros(size, dtype=bool)
+        self.min_confidence = np.ones(size, dtype=np.float32)
+        self.min_area = np.zeros(size, dtype=np.float32)
+        self.cooldown = np.zeros(size, dtype=np.float64)
+        self.severity = np.ones(size, dtype=np.int32)
+
+        # Person boxes are counted for presence checks, not alerted on
+        self.person_id = ids.get("person")
+        self.person_confidence = getattr(settings, "PRESENCE_MIN_CONFIDENCE", 0.5)
+
+        for rule in rules:
+            class_id = ids.get(rule["object_name"])
+            if class_id is None:
+                continue  # class not known to this detector
+            self.enabled[class_id] = True
+            self.min_confidence[class_id] = rule["min_confidence"]
+            self.min_area[class_id] = rule["min_box_area"]
+            self.cooldown[class_id] = rule["cooldown_seconds"]
+            self.severity[class_id] = rule["severity"]
+
+    def keep_mask(self, class_ids, confidences, areas):
+        """Per-box boolean mask: class enabled and thresholds met."""
+        import numpy as np
+
+        class_ids = class_ids.astype(np.intp, copy=False)
+        in_range = class_ids < len(self.labels)
+        safe_ids = np.where(in_range, class_ids, 0)
+
+        return (
+            in_range
+            & self.enabled[safe_ids]
+            & (confidences >= self.min_confidence[safe_ids])
+            & (areas >= self.min_area[safe_ids])
+        )
+
+    def evaluate(self, result):
+        """
+        One detector result (exams.detectors.Detections) in; returns
+        ``(class_ids, confidences, boxes, person_count)`` where the arrays
+        hold only the boxes that pass the policy and ``boxes`` are
+        normalized (x1, y1, x2, y2).
+        """
+        import numpy as np
+
+        if result is None or len(result) == 0:
+            return np.empty(0, np.intp), np.empty(0, np.float32), np.empty((0, 4), np.float32), 0
+
+        cls, conf, xyxyn = result.cls, result.conf, result.xyxyn
+        areas = (xyxyn[:, 2] - xyxyn[:, 0]) * (xyxyn[:, 3] - xyxyn[:, 1])
+        keep = self.keep_mask(cls, conf, areas)
+
+        person_count = 0
+        if self.person_id is not None:
+            person_count = int(((cls == self.person_id) & (conf >= self.person_confidence)).sum())
+
+        return cls[keep].astype(np.intp), conf[keep], xyxyn[keep], person_count
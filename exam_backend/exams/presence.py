@@ -0,0 +1,59 @@
+# ========================= IMPORTS =========================
+
+from django.conf import settings
+
+
+# ===========================================================
+#                 CANDIDATE PRESENCE MONITOR
+# ===========================================================
+
+class PresenceMonitor:
+    """
+    Small per-session state machine over the number of ``person`` boxes
+    in each detected frame (taken from the regular detection pass).
+
+    Emits (object_name, warning_type) events:
+      * "no person"          - nobody in view for ``absent_after`` seconds
+      * "person left frame"  - the candidate is back after a reported
+                               absence; ends the "no person" incident
+                               rather than counting as another warning
+      * "multiple persons"   - more than one person in ``multiple_after``
+                               consecutive detections
+    Each condition is reported once per occurrence, not once per frame.
+    """
+
+    def __init__(self, absent_after=None, multiple_after=None):
+        self.absent_after = absent_after or getattr(settings, "PRESENCE_ABSENT_SECONDS", 3.0)
+        self.multiple_after = multiple_after or getattr(settings, "PRESENCE_MULTIPLE_CONFIRM", 2)
+
+        self._absent_since = None
+        self._absent_reported = False
+        self._multiple_hits = 0
+        self._multiple_reported = False
+
+    def update(self, person_count, now):
+        events = []
+
+        if person_count == 0:
+            if self._absent_since is None:
+                self._absent_since = now
+            if not self._absent_reported and now - self._absent_since >= self.absent_after:
+                events.append(("no person", "No person in frame!"))
+                self._absent_reported = True
+        else:
+            if self._absent_reported:
+                gone = int(round(now - self._absent_since))
+                events.append(("person left frame", f"Person left frame for {gone} seconds"))
+            self._absent_since = None
+            self._absent_reported = False
+
+        if person_count > 1:
+            self._multiple_hits += 1
+            if not self._multiple_reported and self._multiple_hits >= self.multiple_after:
+                events.append(("multiple persons", f"{person_count} persons detected!"))
+                self._multiple_reported = True
+        else:
+            self._multiple_hits = 0
+            self._multiple_reported = False
+
+        return events
@@ -0,0 +1,84 @@
+# ========================= IMPORTS =========================
+
+import time
+
+from django.conf import settings
+
+from .metrics import JPEG_ENCODE_SECONDS
+
+
+MJPEG_BOUNDARY = b'--frame\r\nContent-Type: image/jpeg\r\n\r\n'
+
+_KEEPALIVE = None
+
+
+def _keepalive_chunk():
+    """A 1x1 black JPEG part, encoded once."""
+    global _KEEPALIVE
+    if _KEEPALIVE is None:
+        import cv2
+        import numpy as np
+
+        ok, jpeg = cv2.imencode('.jpg', np.zeros((1, 1, 3), dtype=np.uint8))
+        _KEEPALIVE = MJPEG_BOUNDARY + jpeg.tobytes() + b'\r\n'
+    return _KEEPALIVE
+
+
+# ===========================================================
+#                   MJPEG PREVIEW ENCODING
+# ===========================================================
+
+class PreviewEncoder:
+    """
+    Encodes the candidate's self-view preview independently of detection:
+    its own resolution, JPEG quality and frame rate, or nothing at all.
+    Detection always sees the full-resolution frame.
+
+    Frames are downscaled into one preallocated buffer; only frames that
+    are actually sent get encoded. While disabled it still emits a tiny
+    blank part every ``keepalive`` seconds: a streaming response only
+    notices a closed connection when it writes to it.
+    """
+
+    def __init__(self, enabled=None, width=None, quality=None, fps=None, keepalive=None):
+        self.enabled = getattr(settings, "PREVIEW_ENABLED", True) if enabled is None else enabled
+        self.keepalive = keepalive or getattr(settings, "PREVIEW_KEEPALIVE_SECONDS", 5.0)
+        self.width = width or getattr(settings, "PREVIEW_WIDTH", 320)
+        self.quality = quality or getattr(settings, "PREVIEW_JPEG_QUALITY", 60)
+        self.interval = 1.0 / max(0.1, fps or getattr(settings, "PREVIEW_FPS", 10))
+
+        self._buffer = None
+        self._params = None
+        self._last_sent = 0.0
+
+    def encode(self, frame, now=None):
+        """Returns one multipart MJPEG chunk, or None if this frame is skipped."""
+        now = now or time.monotonic()
+        if not self.enabled:
+            if now - self._last_sent < self.keepalive:
+                return None
+            self._last_sent = now
+            return _keepalive_chunk()
+
+        if now - self._last_sent < self.interval:
+            return None
+        self._last_sent = now
+
+        import cv2
+        import numpy as np
+
+        height, width = frame.shape[:2]
+        if width > self.width:
+            size = (self.width, max(1, height * self.width // width))
+            if self._buffer is None or self._buffer.shape[1::-1] != size:
+                self._buffer = np.empty((size[1], size[0], 3), dtype=np.uint8)
+                self._params = [cv2.IMWRITE_JPEG_QUALITY, int(self.quality)]
+            frame = cv2.resize(frame, size, dst=self._buffer, interpolation=cv2.INTER_AREA)
+        elif self._params is None:
+            self._params = [cv2.IMWRITE_JPEG_QUALITY, int(self.quality)]
+
+        with JPEG_ENCODE_SECONDS.time("preview"):
+            ok, jpeg = cv2.imencode('.jpg', frame, self._params)
+        if not ok:
+            return None
+        return MJPEG_BOUNDARY + jpeg.tobytes() + b'\r\n'
@@ -0,0 +1,229 @@
+# ========================= IMPORTS =========================
+
+import asyncio
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+
+from .evidence import evidence_store
+from .inference import inference_server
+from .live_wall import thumbnail_hub
+from .metrics import DETECTION_WAIT_SECONDS, DETECTIONS, DROPPED_FRAMES, FRAMES, PREPROCESS_SECONDS, metrics
+from .policy import CompiledPolicy, aload_rules, load_rules
+from .presence import PresenceMonitor
+from .tracking import IncidentTracker
+from .sampling import AdaptiveSampler
+from .session_registry import session_registry
+from .warning_writer import warning_writer
+
+
+# Bounded pool for the blocking parts of the async pipeline (capture,
+# decode, sampling); waiting for the detector never holds one of these
+stream_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, "PROCTORING_STREAM_THREADS", 32),
+    thread_name_prefix="proctoring",
+)
+
+
+# A sampled frame whose result takes longer than this is dropped, so a
+# lost detector request can never hang a stream
+DETECTION_TIMEOUT = getattr(settings, "DETECTION_TIMEOUT_SECONDS", 10.0)
+
+
+# ===========================================================
+#                  PER-CANDIDATE DETECTION
+# ===========================================================
+
+class ProctoringSession:
+    """
+    Detection state for one (student, exam) attempt, independent of where
+    the frames come from (server webcam or browser upload).
+    """
+
+    def __init__(self, student_id, exam_id, sampler=None, rules=None):
+        self.student_id = student_id
+        self.exam_id = exam_id
+        self.sampler = sampler or AdaptiveSampler()
+
+        # Policy rules as dicts; compiled against the detector's classes
+        # on the first sampled frame
+        self.rules = rules
+        self.policy = None
+        self.presence = PresenceMonitor() if getattr(settings, "PRESENCE_CHECKS_ENABLED", True) else None
+        self.tracker = IncidentTracker()
+        self._absence_key = None   # incident_key of the open "no person" warning
+        self.evidence = getattr(settings, "EVIDENCE_ENABLED", True)
+
+        self.frame_count = 0
+
+        # Set by session_registry once the pipeline is admitted; ``active``
+        # turns False when another pipeline takes over this attempt
+        self.active = True
+        self.degraded = False
+        self.source = None
+        self.started_at = None
+
+    @staticmethod
+    def _sampler(bounds):
+        return AdaptiveSampler(
+            min_fps=bounds.get("min_detection_fps"),
+            max_fps=bounds.get("max_detection_fps"),
+        )
+
+    @classmethod
+    def for_exam(cls, student_id, exam_id, **kwargs):
+        """Build a session using the exam's detection-rate bounds and policy."""
+        from .models import Exam
+
+        bounds = Exam.objects.filter(id=exam_id).values("min_detection_fps", "max_detection_fps").first() or {}
+        kwargs.setdefault("rules", load_rules(exam_id))
+        return cls(student_id, exam_id, sampler=cls._sampler(bounds), **kwargs)
+
+    @classmethod
+    async def afor_exam(cls, student_id, exam_id, **kwargs):
+        """``for_exam`` with async ORM queries, for consumers and async views."""
+        from .models import Exam
+
+        bounds = await Exam.objects.filter(id=exam_id).values("min_detection_fps", "max_detection_fps").afirst() or {}
+        if "rules" not in kwargs:
+            kwargs["rules"] = await aload_rules(exam_id)
+        return cls(student_id, exam_id, sampler=cls._sampler(bounds), **kwargs)
+
+    def process(self, frame):
+        """
+        Feed one BGR frame. Returns the alert labels logged for it, or
+        None when the frame was not sampled for detection.
+        """
+        if not self.sample(frame):
+            return None
+        return self.detect(frame)
+
+    async def aprocess(self, frame):
+        """``process`` for the event loop; blocking steps run on stream_executor."""
+        loop = asyncio.get_running_loop()
+        if not await loop.run_in_executor(stream_executor, self.sample, frame):
+            return None
+        return await self.adetect(frame)
+
+    def sample(self, frame):
+        """Per-frame bookkeeping; True when ``frame`` should go to the detector."""
+        self.frame_count += 1
+        FRAMES.inc(self.source or "other")
+
+        # Invigilator thumbnails reuse this frame (no-op when nobody watches)
+        thumbnail_hub.publish(self.exam_id, self.student_id, frame)
+
+        # 1. ONLY PROCESS SAMPLED FRAMES (rate adapts to motion, alerts and load)
+        with PREPROCESS_SECONDS.time("sample"):
+            sampled = self.sampler.should_detect(frame, queue_depth=inference_server.pending())
+        if not sampled:
+            DROPPED_FRAMES.inc("sampled_out")
+        return sampled
+
+    def detect(self, frame):
+        """Run a sampled frame through the detector and log its alerts."""
+        self._compile_policy()
+        try:
+            with DETECTION_WAIT_SECONDS.time():
+                result = inference_server.detect(frame, timeout=DETECTION_TIMEOUT)
+        except TimeoutError:
+            DROPPED_FRAMES.inc("timeout")
+            return []
+        return self.handle(frame, result)
+
+    async def adetect(self, frame):
+        """``detect`` that awaits the shared detector without holding a thread."""
+        loop = asyncio.get_running_loop()
+        try:
+            with DETECTION_WAIT_SECONDS.time():
+                # submit() may copy the frame and block for a free pool slot,
+                # so it runs on the executor; only the wait happens on the loop
+                future = await loop.run_in_executor(stream_executor, inference_server.submit, frame)
+                result = await asyncio.wait_for(asyncio.wrap_future(future), DETECTION_TIMEOUT)
+        except (TimeoutError, asyncio.TimeoutError):
+            DROPPED_FRAMES.inc("timeout")
+            return []
+        if self.policy is None:
+            # First frame only: may load the detector's class names
+            await loop.run_in_executor(stream_executor, self._compile_policy)
+        return self.handle(frame, result)
+
+    def _compile_policy(self):
+        if self.policy is None:
+            rules = load_rules(self.exam_id) if self.rules is None else self.rules
+            self.policy = CompiledPolicy(rules, inference_server.class_names())
+
+    def handle(self, frame, r):
+        """Policy, incident tracking and presence checks for one detector result."""
+        # 2. POLICY: class mask and thresholds
+        now = time.time()
+        class_ids, confidences, boxes, person_count = self.policy.evaluate(r)
+        if metrics.enabled:
+            for class_id in class_ids.tolist():
+                DETECTIONS.inc(self.policy.labels[class_id])
+
+        # 3. INCIDENTS: one warning per continuous, confirmed sighting
+        started, ended = self.tracker.update(
+            class_ids.tolist(), confidences.tolist(), boxes.tolist(), now, self.policy.cooldown
+        )
+        alerts = []
+
+        for track in started:
+            label = self.policy.labels[track.class_id]
+
+            # Written in the background so the stream never waits on the DB
+            warning_writer.enqueue(
+                self.student_id,
+                self.exam_id,
+                label,
+                f"{label.capitalize()} detected!",
+                weight=int(self.policy.severity[track.class_id]),
+                seen_at=track.first_seen,
+                incident_key=track.key,
+                peak_confidence=track.peak,
+            )
+            if self.evidence:
+                evidence_store.capture(self.student_id, self.exam_id, track.key, frame, track.box)
+            alerts.append(label)
+
+        self._end_incidents(ended)
+
+        # 4. PRESENCE: absent / multiple persons from the same detection pass
+        if self.presence is not None:
+            for label, warning_type in self.presence.update(person_count, now):
+                if label == "person left frame":
+                    # The return closes the absence; it is not a second warning
+                    self._end_absence(now)
+                    continue
+                key = uuid.uuid4().hex
+                if label == "no person":
+                    self._absence_key = key
+                warning_writer.enqueue(self.student_id, self.exam_id, label, warning_type, incident_key=key)
+                if self.evidence:
+                    evidence_store.capture(self.student_id, self.exam_id, key, frame)
+                alerts.append(label)
+
+        if alerts:
+            self.sampler.notify_alert()
+
+        return alerts
+
+    def _end_incidents(self, tracks):
+        for track in tracks:
+            warning_writer.end_incident(track.key, track.last_seen, track.peak)
+
+    def _end_absence(self, now):
+        if self._absence_key is not None:
+            warning_writer.end_incident(self._absence_key, now, None)
+            self._absence_key = None
+
+    def close(self):
+        # Thumbnails and evidence dedup are keyed by attempt, so leave them
+        # alone when a replacement pipeline has already taken over
+        if session_registry.release(self):
+            thumbnail_hub.end_session(self.exam_id, self.student_id)
+            evidence_store.end_session(self.student_id, self.exam_id)
+        self._end_incidents(self.tracker.close())
+        self._end_absence(time.time())
@@ -0,0 +1,124 @@
+# ========================= IMPORTS =========================
+
+import threading
+from collections import OrderedDict, namedtuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import Question
+
+# questions: rendered payload (list of dicts, question order)
+# answer_key: ((question_id, correct_option, marks), ...)
+ExamQuestions = namedtuple("ExamQuestions", ["questions", "answer_key"])
+
+QUESTION_FIELDS = (
+    "id", "question_text",
+    "option_a", "option_b", "option_c", "option_d",
+    "correct_option", "marks",
+)
+
+
+# ===========================================================
+#                  PER-EXAM QUESTION CACHE
+# ===========================================================
+
+class QuestionCache:
+    """
+    Process-local LRU of each exam's questions and answer key, optionally
+    backed by the configured Django cache so workers share one copy.
+
+    Entries are keyed by ``Exam.question_version``; the version is bumped
+    from the Question signals, so stale entries are simply never read
+    again. Loads are serialized per exam so a burst of candidates starting
+    the same exam results in a single database query per process; the
+    load locks are a fixed set of stripes, so they stay bounded however
+    many exams pass through.
+    """
+
+    LOAD_LOCK_STRIPES = 64
+
+    def __init__(self, max_entries=256, use_django_cache=False, timeout=3600):
+        self.max_entries = max(1, int(max_entries))
+        self.use_django_cache = use_django_cache
+        self.timeout = timeout
+
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = [threading.Lock() for _ in range(self.LOAD_LOCK_STRIPES)]
+
+    def get(self, exam_id, version):
+        key = (exam_id, version)
+
+        entry = self._get_local(key)
+        if entry is not None:
+            return entry
+
+        with self._load_lock(exam_id):
+            # Another thread may have loaded it while we waited
+            entry = self._get_local(key)
+            if entry is None:
+                entry = self._get_shared(key) or self._load(key)
+                self._put_local(key, entry)
+        return entry
+
+    def invalidate(self, exam_id):
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == exam_id]:
+                del self._entries[key]
+
+    # ---------------- helpers ----------------
+
+    def _load_lock(self, exam_id):
+        return self._load_locks[hash(exam_id) % len(self._load_locks)]
+
+    def _get_local(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _put_local(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _shared_key(self, key):
+        return "exam_questions:%s:%s" % key
+
+    def _get_shared(self, key):
+        if not self.use_django_cache:
+            return None
+        cached = caches["default"].get(self._shared_key(key))
+        return ExamQuestions(*cached) if cached is not None else None
+
+    def _load(self, key):
+        exam_id, _ = key
+        questions = list(
+            Question.objects
+            .filter(exam_id=exam_id)
+            .order_by("id")
+            .values(*QUESTION_FIELDS)
+        )
+        entry = ExamQuestions(
+            questions=questions,
+            answer_key=tuple((q["id"], q["correct_option"], q["marks"]) for q in questions),
+        )
+
+        if self.use_django_cache:
+            caches["default"].set(self._shared_key(key), tuple(entry), self.timeout)
+        return entry
+
+
+question_cache = QuestionCache(
+    max_entries=getattr(settings, "QUESTION_CACHE_SIZE", 256),
+    use_django_cache=getattr(settings, "QUESTION_CACHE_USE_DJANGO_CACHE", False),
+    timeout=getattr(settings, "QUESTION_CACHE_TIMEOUT", 3600),
+)
+
+
+def get_exam_questions(exam):
+    return question_cache.get(exam.id, exam.question_version)
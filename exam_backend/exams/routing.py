@@ -1,6 +1,8 @@
 from django.urls import re_path
-from .consumers import WarningConsumer
+from .consumers import FrameIngestConsumer, LiveWallConsumer, WarningConsumer
 
 websocket_urlpatterns = [
-    re_path(r"ws/warnings/$", WarningConsumer.as_asgi()),
+    re_path(r"ws/warnings/(?P<exam_id>\d+)/$", WarningConsumer.as_asgi()),
+    re_path(r"ws/proctor/(?P<exam_id>\d+)/frames/$", FrameIngestConsumer.as_asgi()),
+    re_path(r"ws/invigilate/(?P<exam_id>\d+)/$", LiveWallConsumer.as_asgi()),
 ]
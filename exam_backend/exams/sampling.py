@@ -0,0 +1,93 @@
+# ========================= IMPORTS =========================
+
+import time
+
+from django.conf import settings
+
+
+# ===========================================================
+#                 ADAPTIVE DETECTION SAMPLING
+# ===========================================================
+
+class AdaptiveSampler:
+    """
+    Decides which frames of a session go to the detector.
+
+    The detection rate moves between ``min_fps`` and ``max_fps``:
+      * static scene (small difference between downscaled grayscale
+        frames) -> floor rate
+      * large scene change, or a recent alert -> ceiling rate for
+        ``boost_seconds``
+      * anything in between is interpolated on the motion score
+    When the shared inference queue backs up past ``backlog``, every
+    session's rate is scaled back towards its floor.
+    """
+
+    THUMB_SIZE = (32, 24)
+
+    def __init__(self, min_fps=None, max_fps=None, backlog=None,
+                 static_threshold=0.02, change_threshold=0.12, boost_seconds=3.0):
+        self.min_fps = min_fps or getattr(settings, "DETECTION_MIN_FPS", 0.5)
+        self.max_fps = max(self.min_fps, max_fps or getattr(settings, "DETECTION_MAX_FPS", 3.0))
+        self.backlog = backlog or getattr(settings, "DETECTION_BACKLOG_THROTTLE", 32)
+        self._bounds = (self.min_fps, self.max_fps)
+
+        self.static_threshold = static_threshold
+        self.change_threshold = change_threshold
+        self.boost_seconds = boost_seconds
+
+        self._previous = None
+        self._last_detection = 0.0
+        self._boost_until = 0.0
+        self.motion = 0.0
+        self.rate = self.min_fps
+
+    def motion_score(self, frame):
+        """Mean absolute difference (0..1) against the previous frame."""
+        import cv2
+
+        small = cv2.resize(frame, self.THUMB_SIZE, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+        previous, self._previous = self._previous, gray
+        if previous is None:
+            return 1.0
+        return float(cv2.absdiff(gray, previous).mean()) / 255.0
+
+    def limit(self, max_fps=None):
+        """Cap the rate at ``max_fps`` (load shedding); None restores the configured bounds."""
+        min_fps, ceiling = self._bounds
+        if max_fps is None:
+            self.min_fps, self.max_fps = min_fps, ceiling
+        else:
+            self.max_fps = min(ceiling, max_fps)
+            self.min_fps = min(min_fps, self.max_fps)
+
+    def notify_alert(self, now=None):
+        self._boost_until = (now or time.monotonic()) + self.boost_seconds
+
+    def should_detect(self, frame, queue_depth=0, now=None):
+        now = now or time.monotonic()
+        self.motion = self.motion_score(frame)
+
+        if self.motion >= self.change_threshold:
+            self.notify_alert(now)
+
+        if now < self._boost_until:
+            rate = self.max_fps
+        elif self.motion <= self.static_threshold:
+            rate = self.min_fps
+        else:
+            span = (self.motion - self.static_threshold) / (self.change_threshold - self.static_threshold)
+            rate = self.min_fps + span * (self.max_fps - self.min_fps)
+
+        # Global throttle: shed load while the inference queue is backed up
+        if queue_depth > self.backlog:
+            rate = max(self.min_fps, rate * self.backlog / queue_depth)
+
+        self.rate = rate
+        if now - self._last_detection < 1.0 / rate:
+            return False
+
+        self._last_detection = now
+        return True
@@ -0,0 +1,103 @@
+# ========================= IMPORTS =========================
+
+import threading
+import time
+
+from django.conf import settings
+
+
+# ===========================================================
+#              ACTIVE PROCTORING SESSION REGISTRY
+# ===========================================================
+
+class SessionRegistry:
+    """
+    Tracks every running detection pipeline on this node, keyed by
+    (student, exam).
+
+    * One pipeline per attempt: a new one (reload, second tab) takes over
+      and the older one is marked inactive so its loop stops.
+    * Past ``max_sessions`` full-rate pipelines, new ones are admitted in
+      degraded mode, sampling at no more than ``degraded_fps``. They are
+      promoted, oldest first, as full-rate pipelines end.
+    """
+
+    def __init__(self, max_sessions=200, degraded_fps=0.5):
+        self.max_sessions = max(1, int(max_sessions))
+        self.degraded_fps = degraded_fps
+
+        # (student_id, exam_id) -> ProctoringSession, in admission order
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    # ---------------- admission ----------------
+
+    def admit(self, session, source):
+        """Register ``session`` (``source`` is "server" or "client")."""
+        key = (session.student_id, session.exam_id)
+        session.source = source
+        session.started_at = time.time()
+
+        with self._lock:
+            # The replacement inherits the slot the old pipeline frees
+            previous = self._sessions.pop(key, None)
+            if previous is not None:
+                previous.active = False
+
+            full_rate = sum(1 for s in self._sessions.values() if not s.degraded)
+            self._set_degraded(session, full_rate >= self.max_sessions)
+            self._sessions[key] = session
+        return session
+
+    def release(self, session):
+        """
+        Forget ``session`` if it is still the registered pipeline. Returns
+        False when a replacement already owns the attempt.
+        """
+        key = (session.student_id, session.exam_id)
+        with self._lock:
+            if self._sessions.get(key) is not session:
+                return False
+            del self._sessions[key]
+            if not session.degraded:
+                self._promote()
+        return True
+
+    def _promote(self):
+        for waiting in self._sessions.values():
+            if waiting.degraded:
+                self._set_degraded(waiting, False)
+                return
+
+    def _set_degraded(self, session, degraded):
+        session.degraded = degraded
+        session.sampler.limit(self.degraded_fps if degraded else None)
+
+    # ---------------- ops ----------------
+
+    def snapshot(self):
+        now = time.time()
+        with self._lock:
+            sessions = list(self._sessions.values())
+
+        return {
+            "active": len(sessions),
+            "degraded": sum(1 for s in sessions if s.degraded),
+            "max_sessions": self.max_sessions,
+            "sessions": [{
+                "student_id": s.student_id,
+                "exam_id": s.exam_id,
+                "source": s.source,
+                "degraded": s.degraded,
+                "uptime_s": round(now - s.started_at, 1),
+                "frames": s.frame_count,
+                "detection_fps": round(s.sampler.rate, 2),
+                "open_incidents": sum(1 for t in s.tracker.tracks if t.confirmed),
+            } for s in sessions],
+        }
+
+
+session_registry = SessionRegistry(
+    max_sessions=getattr(settings, "PROCTORING_MAX_SESSIONS", 200),
+    degraded_fps=getattr(settings, "PROCTORING_DEGRADED_FPS", 0.5),
+)
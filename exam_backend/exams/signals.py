@@ -0,0 +1,14 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Exam, Question
+from .question_cache import question_cache
+
+
+@receiver(post_save, sender=Question)
+@receiver(post_delete, sender=Question)
+def bump_question_version(sender, instance, **kwargs):
+    # New version -> new cache key in every process; drop our own copy now
+    Exam.objects.filter(id=instance.exam_id).update(question_version=F("question_version") + 1)
+    question_cache.invalidate(instance.exam_id)
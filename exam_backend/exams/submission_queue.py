@@ -0,0 +1,158 @@
+# ========================= IMPORTS =========================
+
+import logging
+import queue
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .grading import grade_submission
+from .models import Result, SubmissionJob
+
+logger = logging.getLogger(__name__)
+
+
+# ===========================================================
+#                  DEADLINE-BURST GRADING QUEUE
+# ===========================================================
+
+class GradingQueue:
+    """
+    Accepts a submission by storing it as a SubmissionJob and returns
+    straight away; a small pool of worker threads grades the jobs.
+
+    The SubmissionJob table is the source of truth, the in-process queue
+    only carries job ids. Jobs are claimed with a conditional UPDATE and
+    grading itself is idempotent (see grade_submission), so retries and
+    duplicate submits never produce a second Result.
+    """
+
+    # PROCESSING jobs untouched for this long are assumed orphaned
+    STALE_AFTER = timedelta(minutes=5)
+
+    def __init__(self, workers=4, max_attempts=3):
+        self.workers = max(1, int(workers))
+        self.max_attempts = max(1, int(max_attempts))
+
+        self._queue = queue.Queue()
+        self._queued = set()      # job ids waiting in _queue
+        self._threads = []
+        self._lock = threading.Lock()
+
+    # ---------------- public API ----------------
+
+    def submit(self, assignment, answers, idempotency_key):
+        job, created = SubmissionJob.objects.get_or_create(
+            idempotency_key=idempotency_key,
+            defaults={"assignment": assignment, "answers": answers},
+        )
+        if created:
+            self.start()
+            transaction.on_commit(lambda: self._enqueue(job.id))
+        else:
+            self.resume(job)
+        return job
+
+    def resume(self, job):
+        """
+        Make sure a waiting ``job`` gets graded by this process: starts the
+        workers (recovering jobs a previous process left behind) and
+        re-queues the job if it is still PENDING. Called on duplicate
+        submits and status polls, so a restart never strands a job.
+        """
+        self.start()
+        if job.status == "PENDING":
+            self._enqueue(job.id)
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def start(self):
+        with self._lock:
+            self._threads = [t for t in self._threads if t.is_alive()]
+            if self._threads:
+                return
+
+            self._recover()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f"grading-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    # ---------------- worker loop ----------------
+
+    def _enqueue(self, job_id):
+        # Status polls re-offer waiting jobs; queue each one only once
+        with self._lock:
+            if job_id in self._queued:
+                return
+            self._queued.add(job_id)
+        self._queue.put(job_id)
+
+    def _take(self):
+        job_id = self._queue.get()
+        with self._lock:
+            self._queued.discard(job_id)
+        return job_id
+
+    def _recover(self):
+        """Re-queue work left behind by a previous process."""
+        stale = timezone.now() - self.STALE_AFTER
+        SubmissionJob.objects.filter(status="PROCESSING", updated_at__lt=stale).update(
+            status="PENDING", updated_at=timezone.now()
+        )
+        for job_id in SubmissionJob.objects.filter(status="PENDING").values_list("id", flat=True):
+            self._queued.add(job_id)   # start() holds the lock
+            self._queue.put(job_id)
+
+    def _run(self):
+        while True:
+            job_id = self._take()
+            close_old_connections()
+            try:
+                self.process(job_id)
+            except Exception:
+                logger.exception("Grading job %s crashed", job_id)
+
+    def process(self, job_id):
+        # Claim the job; another worker or process may have beaten us to it
+        claimed = SubmissionJob.objects.filter(id=job_id, status="PENDING").update(
+            status="PROCESSING", attempts=F("attempts") + 1, updated_at=timezone.now()
+        )
+        if not claimed:
+            return
+
+        job = SubmissionJob.objects.select_related("assignment__exam").get(id=job_id)
+        try:
+            result = grade_submission(job.assignment, job.answers)
+            if result is None:
+                # Already graded by an earlier attempt or another job
+                result = Result.objects.filter(
+                    exam_id=job.assignment.exam_id, student_id=job.assignment.student_id
+                ).first()
+        except Exception as exc:
+            retry = job.attempts < self.max_attempts
+            SubmissionJob.objects.filter(id=job_id).update(
+                status="PENDING" if retry else "FAILED",
+                error=str(exc),
+                updated_at=timezone.now(),
+            )
+            if retry:
+                time.sleep(min(2 ** job.attempts, 10) * 0.1)
+                self._enqueue(job_id)
+            return
+
+        SubmissionJob.objects.filter(id=job_id).update(
+            status="DONE", result=result, error="", updated_at=timezone.now()
+        )
+
+
+grading_queue = GradingQueue(
+    workers=getattr(settings, "GRADING_WORKERS", 4),
+    max_attempts=getattr(settings, "GRADING_MAX_ATTEMPTS", 3),
+)
@@ -0,0 +1,1034 @@
+import asyncio
+import hashlib
+import importlib
+import os
+import queue
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+
+import numpy as np
+from asgiref.sync import async_to_sync
+from django.apps import apps
+from django.db import OperationalError, connection
+from django.db.migrations.loader import MigrationLoader
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from users.models import User
+
+from .channel_broker import ChannelBroker, LocalBrokerChannelLayer
+from .detection_pool import DetectionPool
+from .detectors import Detections, OnnxDetector
+from .evidence import DIGEST_RE, EvidenceStore
+from .frame_ring import FrameRing
+from .management.commands.check_query_plans import FULL_SCAN, hot_queries
+from .metrics import MetricsRegistry, metrics
+from .models import Exam, ExamAssignment, Question, Result, SubmissionJob, WarningLog
+from .policy import CompiledPolicy
+from .presence import PresenceMonitor
+from .preview import MJPEG_BOUNDARY, PreviewEncoder
+from .proctoring import ProctoringSession
+from .question_cache import ExamQuestions, QuestionCache, get_exam_questions, question_cache
+from .sampling import AdaptiveSampler
+from .submission_queue import GradingQueue
+from .session_registry import SessionRegistry, session_registry
+from .tracking import IncidentTracker
+from .views import agen_frames, evidence_snapshot
+from .warning_writer import WarningWriter
+
+
+# ===========================================================
+#                      DETECTION POOL
+# ===========================================================
+
+class DetectionPoolTests(SimpleTestCase):
+    """Parent-side bookkeeping only; no worker processes are spawned."""
+
+    def make_pool(self, workers=2, slots=4):
+        pool = DetectionPool("unused.onnx", workers=workers, slots=slots, slot_shape=(8, 8, 3), timeout=0.1)
+        pool._started = True
+        pool._slots = np.zeros((pool.slot_count, *pool.slot_shape), dtype=np.uint8)
+        for slot in range(pool.slot_count):
+            pool._free.put(slot)
+        pool._tasks = [queue.Queue() for _ in range(pool.workers)]
+        return pool
+
+    def test_requests_are_spread_over_workers(self):
+        pool = self.make_pool()
+        for _ in range(4):
+            pool.submit(np.ones((8, 8, 3), dtype=np.uint8))
+        self.assertEqual([tasks.qsize() for tasks in pool._tasks], [2, 2])
+
+    def test_worker_death_fails_undelivered_requests(self):
+        pool = self.make_pool()
+        futures = [pool.submit(np.ones((8, 8, 3), dtype=np.uint8)) for _ in range(4)]
+        dispatched = {rid: worker for rid, (_, _, worker) in pool._inflight.items()}
+
+        # Nothing was ever taken off worker 0's queue before it died
+        pool._fail_worker(0, RuntimeError("worker died"))
+
+        for rid, future in enumerate(futures):
+            if dispatched[rid] == 0:
+                self.assertIsInstance(future.exception(timeout=0), RuntimeError)
+            else:
+                self.assertFalse(future.done())
+        self.assertEqual(pool.pending(), 2)
+        self.assertEqual(pool._free.qsize(), 2)
+        self.assertEqual(pool._tasks[0].qsize(), 0)
+
+    def test_cancelled_request_is_skipped_and_frees_its_slot(self):
+        pool = self.make_pool(workers=1, slots=2)
+        cancelled = pool.submit(np.ones((8, 8, 3), dtype=np.uint8))
+        waiting = pool.submit(np.ones((8, 8, 3), dtype=np.uint8))
+        self.assertTrue(cancelled.cancel())
+
+        # Must not raise InvalidStateError, which would kill the collector
+        pool._finish(0, result="late")
+        pool._finish(1, result="detections")
+
+        self.assertEqual(waiting.result(timeout=0), "detections")
+        self.assertEqual(pool._free.qsize(), 2)
+        self.assertEqual(pool.pending(), 0)
+
+    def test_detect_times_out_when_no_slot_is_free(self):
+        pool = self.make_pool(workers=1, slots=1)
+        pool.submit(np.ones((8, 8, 3), dtype=np.uint8))
+        with self.assertRaises(TimeoutError):
+            pool.detect(np.ones((8, 8, 3), dtype=np.uint8))
+
+
+# ===========================================================
+#                    SESSION REGISTRY
+# ===========================================================
+
+class FakeSession:
+    def __init__(self, student_id=1, exam_id=1):
+        self.student_id = student_id
+        self.exam_id = exam_id
+        self.sampler = AdaptiveSampler()
+        self.active = True
+        self.degraded = False
+
+
+class SessionRegistryTests(SimpleTestCase):
+    def test_replaced_session_does_not_release_the_attempt(self):
+        registry = SessionRegistry(max_sessions=1)
+        old, new = FakeSession(), FakeSession()
+        registry.admit(old, "server")
+        registry.admit(new, "client")
+
+        self.assertFalse(old.active)
+        self.assertFalse(registry.release(old))
+        self.assertEqual(len(registry._sessions), 1)
+        self.assertTrue(registry.release(new))
+        self.assertEqual(len(registry._sessions), 0)
+
+    def test_release_promotes_a_degraded_session(self):
+        registry = SessionRegistry(max_sessions=1)
+        first, second = FakeSession(student_id=1), FakeSession(student_id=2)
+        registry.admit(first, "server")
+        registry.admit(second, "server")
+        self.assertTrue(second.degraded)
+
+        registry.release(first)
+        self.assertFalse(second.degraded)
+
+
+# ===========================================================
+#                      PREVIEW ENCODER
+# ===========================================================
+
+class PreviewEncoderTests(SimpleTestCase):
+    def test_disabled_preview_still_sends_keepalive_parts(self):
+        preview = PreviewEncoder(enabled=False, keepalive=5.0)
+        frame = np.zeros((480, 640, 3), dtype=np.uint8)
+
+        chunk = preview.encode(frame, now=100.0)
+        self.assertTrue(chunk.startswith(MJPEG_BOUNDARY))
+        self.assertIsNone(preview.encode(frame, now=102.0))
+        self.assertIsNotNone(preview.encode(frame, now=105.0))
+
+
+# ===========================================================
+#                    PRESENCE CHECKS
+# ===========================================================
+
+class PresenceMonitorTests(SimpleTestCase):
+    def test_absence_is_reported_once_then_ended(self):
+        monitor = PresenceMonitor(absent_after=3.0, multiple_after=2)
+
+        self.assertEqual(monitor.update(0, 10.0), [])
+        self.assertEqual([e[0] for e in monitor.update(0, 13.0)], ["no person"])
+        self.assertEqual(monitor.update(0, 20.0), [])
+        self.assertEqual([e[0] for e in monitor.update(1, 21.0)], ["person left frame"])
+        self.assertEqual(monitor.update(1, 22.0), [])
+
+    def test_multiple_persons_need_consecutive_hits(self):
+        monitor = PresenceMonitor(absent_after=3.0, multiple_after=2)
+
+        self.assertEqual(monitor.update(2, 1.0), [])
+        self.assertEqual(monitor.update(1, 2.0), [])
+        self.assertEqual(monitor.update(2, 3.0), [])
+        self.assertEqual([e[0] for e in monitor.update(3, 4.0)], ["multiple persons"])
+        self.assertEqual(monitor.update(3, 5.0), [])
+
+
+def person_detections(count):
+    return Detections(
+        np.zeros(count, dtype=int),
+        np.full(count, 0.9, dtype=np.float32),
+        np.tile(np.array([[0.2, 0.2, 0.6, 0.9]], dtype=np.float32), (count, 1)),
+    )
+
+
+class SessionPresenceTests(SimpleTestCase):
+    def setUp(self):
+        self.session = ProctoringSession(1, 1, rules=[])
+        self.session.policy = CompiledPolicy([], {0: "person"})
+        self.session.presence = PresenceMonitor(absent_after=3.0)
+        self.session.evidence = False
+        self.frame = np.zeros((48, 64, 3), dtype=np.uint8)
+
+    def handle_at(self, now, persons):
+        with mock.patch("exams.proctoring.time.time", return_value=now):
+            return self.session.handle(self.frame, person_detections(persons))
+
+    @mock.patch("exams.proctoring.warning_writer")
+    def test_return_ends_the_absence_instead_of_warning_again(self, writer):
+        self.handle_at(10.0, 0)
+        self.assertEqual(self.handle_at(13.0, 0), ["no person"])
+        self.assertEqual(self.handle_at(20.0, 1), [])
+
+        self.assertEqual(writer.enqueue.call_count, 1)
+        key = writer.enqueue.call_args.kwargs["incident_key"]
+        writer.end_incident.assert_called_once_with(key, 20.0, None)
+
+
+# ===========================================================
+#                 HOT VIEWS: QUERIES AND INDEXES
+# ===========================================================
+
+class ProctoringDataMixin:
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user("teacher", password="pw", role="TEACHER")
+        cls.student = User.objects.create_user("student", password="pw", role="STUDENT")
+        cls.exam = Exam.objects.create(teacher=cls.teacher, title="Algebra", duration=30, total_marks=10)
+        cls.assignment = ExamAssignment.objects.create(exam=cls.exam, student=cls.student, warning_count=3)
+        Result.objects.create(exam=cls.exam, student=cls.student, score=7, total_marks=10)
+
+    def log_warnings(self, student, count):
+        WarningLog.objects.bulk_create(
+            WarningLog(student=student, exam=self.exam, object_name="cell phone", warning_type="Cell phone detected!")
+            for _ in range(count)
+        )
+
+
+class HotViewQueryTests(ProctoringDataMixin, TestCase):
+    """Session + user lookups are the first two queries of every view."""
+
+    def test_attempt_exam_poll(self):
+        self.log_warnings(self.student, 12)
+        self.client.force_login(self.student)
+        url = reverse("attempt_exam", args=[self.exam.id])
+        ajax = {"HTTP_X_REQUESTED_WITH": "XMLHttpRequest"}
+
+        # Stale count: assignment + recent warnings
+        with self.assertNumQueries(4):
+            data = self.client.get(url, {"known": "0"}, **ajax).json()
+        self.assertEqual(data["total_count"], 3)
+        self.assertEqual(len(data["warnings"]), 10)
+
+        # Up to date: the aggregate row alone
+        with self.assertNumQueries(3):
+            data = self.client.get(url, {"known": "3"}, **ajax).json()
+        self.assertIsNone(data["warnings"])
+
+    def test_student_result(self):
+        self.client.force_login(self.student)
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse("student_result", args=[self.exam.id]))
+        self.assertEqual(response.status_code, 200)
+
+    def test_integrity_log_timeline(self):
+        self.log_warnings(self.student, 5)
+        self.client.force_login(self.teacher)
+        with self.assertNumQueries(3):
+            data = self.client.get(reverse("integrity_log_timeline", args=[self.exam.id, self.student.id])).json()
+        self.assertEqual(len(data["timeline"]), 5)
+
+    def test_hot_queries_use_an_index(self):
+        pattern = FULL_SCAN.get(connection.vendor)
+        if pattern is None:
+            self.skipTest(f"No plan checks for {connection.vendor}")
+        for name, queryset in hot_queries().items():
+            with self.subTest(name):
+                self.assertEqual(pattern.findall(queryset.explain()), [])
+
+
+class IntegrityLogQueryTests(ProctoringDataMixin, TestCase):
+    """all_integrity_logs stays at 6 queries however many incidents a page lists."""
+
+    def get_logs(self):
+        self.client.force_login(self.teacher)
+        # session, user, page count, page rows, page results, total count
+        with self.assertNumQueries(6):
+            response = self.client.get(reverse("all_integrity_logs"))
+        self.assertEqual(response.status_code, 200)
+        return response.context["summary_logs"]
+
+    def test_one_incident(self):
+        self.log_warnings(self.student, 1)
+        rows = self.get_logs()
+        self.assertEqual([(r["log_count"], r["score"]) for r in rows], [(1, 7)])
+
+    def test_many_incidents(self):
+        self.log_warnings(self.student, 3)
+        for i in range(10):
+            student = User.objects.create_user(f"student{i}", password="pw", role="STUDENT")
+            Result.objects.create(exam=self.exam, student=student, score=i, total_marks=10)
+            self.log_warnings(student, 2)
+
+        rows = self.get_logs()
+        self.assertEqual(len(rows), 11)
+        self.assertEqual(rows[0]["log_count"], 3)
+
+
+# ===========================================================
+#                 LOCAL BROKER CHANNEL LAYER
+# ===========================================================
+
+class LocalBrokerLayerTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.broker_loop = asyncio.new_event_loop()
+        server = cls.broker_loop.run_until_complete(
+            asyncio.start_server(ChannelBroker().handle, "127.0.0.1", 0)
+        )
+        cls.port = server.sockets[0].getsockname()[1]
+        threading.Thread(target=cls.broker_loop.run_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.broker_loop.call_soon_threadsafe(cls.broker_loop.stop)
+        super().tearDownClass()
+
+    def test_sync_callers_share_one_connection(self):
+        layer = LocalBrokerChannelLayer(port=self.port)
+        channel = async_to_sync(layer.new_channel)()
+        async_to_sync(layer.group_add)("exam_1", channel)
+        connection = layer._conn
+
+        for i in range(3):
+            async_to_sync(layer.group_send)("exam_1", {"type": "send_warning", "i": i})
+        received = [async_to_sync(layer.receive)(channel)["i"] for _ in range(3)]
+
+        self.assertEqual(received, [0, 1, 2])
+        self.assertIs(layer._conn, connection)
+        async_to_sync(layer.close)()
+
+
+# ===========================================================
+#                    INCIDENT TRACKING
+# ===========================================================
+
+PHONE = 67
+BOX = (0.1, 0.1, 0.3, 0.3)
+MOVED = (0.12, 0.11, 0.32, 0.31)
+
+
+class IncidentTrackerTests(SimpleTestCase):
+    def make_tracker(self):
+        return IncidentTracker(iou_threshold=0.3, confirm_hits=2, window=3, end_after=3.0)
+
+    def test_incident_starts_once_confirmed_and_ends_after_timeout(self):
+        tracker = self.make_tracker()
+
+        self.assertEqual(tracker.update([PHONE], [0.6], [BOX], 0.0), ([], []))
+        started, ended = tracker.update([PHONE], [0.8], [MOVED], 1.0)
+        self.assertEqual(len(started), 1)
+        self.assertEqual(ended, [])
+        track = started[0]
+        self.assertEqual(track.peak, 0.8)
+
+        # Still in view: the same incident, no new warning
+        self.assertEqual(tracker.update([PHONE], [0.7], [MOVED], 2.0), ([], []))
+        self.assertEqual(tracker.update([], [], [], 4.0), ([], []))
+        self.assertEqual(tracker.update([], [], [], 5.5), ([], [track]))
+        self.assertEqual(tracker.tracks, [])
+
+    def test_single_spurious_detection_never_starts_an_incident(self):
+        tracker = self.make_tracker()
+        tracker.update([PHONE], [0.9], [BOX], 0.0)
+        for now in (1.0, 2.0, 3.0):
+            self.assertEqual(tracker.update([], [], [], now), ([], []))
+        self.assertEqual(tracker.tracks, [])
+
+    def test_cooldown_extends_the_incident(self):
+        tracker = self.make_tracker()
+        cooldowns = np.zeros(80)
+        cooldowns[PHONE] = 10.0
+        tracker.update([PHONE], [0.9], [BOX], 0.0, cooldowns)
+        tracker.update([PHONE], [0.9], [BOX], 1.0, cooldowns)
+
+        self.assertEqual(tracker.update([], [], [], 6.0, cooldowns), ([], []))
+        self.assertEqual(len(tracker.update([], [], [], 12.0, cooldowns)[1]), 1)
+
+    def test_close_ends_only_confirmed_tracks(self):
+        tracker = self.make_tracker()
+        tracker.update([PHONE, 73], [0.9, 0.9], [BOX, (0.6, 0.6, 0.9, 0.9)], 0.0)
+        tracker.update([PHONE], [0.9], [BOX], 1.0)
+
+        ended = tracker.close()
+        self.assertEqual([t.class_id for t in ended], [PHONE])
+        self.assertEqual(tracker.tracks, [])
+
+
+# ===========================================================
+#                   COMPILED DETECTION POLICY
+# ===========================================================
+
+NAMES = {0: "person", 67: "cell phone", 73: "book"}
+RULES = [
+    {"object_name": "cell phone", "min_confidence": 0.5, "min_box_area": 0.01, "cooldown_seconds": 4.0, "severity": 2},
+    {"object_name": "laptop", "min_confidence": 0.5, "min_box_area": 0.0, "cooldown_seconds": 0.0, "severity": 1},
+]
+
+
+class CompiledPolicyTests(SimpleTestCase):
+    def test_rules_compile_to_class_id_vectors(self):
+        policy = CompiledPolicy(RULES, NAMES)
+
+        self.assertEqual(policy.labels[67], "cell phone")
+        self.assertTrue(policy.enabled[67])
+        self.assertFalse(policy.enabled[73])   # no rule
+        self.assertEqual(policy.cooldown[67], 4.0)
+        self.assertEqual(policy.severity[67], 2)
+        self.assertEqual(policy.person_id, 0)
+        # "laptop" is unknown to this detector and simply ignored
+        self.assertEqual(int(policy.enabled.sum()), 1)
+
+    def test_evaluate_filters_boxes_and_counts_persons(self):
+        policy = CompiledPolicy(RULES, NAMES)
+        result = Detections(
+            np.array([67, 67, 67, 73, 0, 0, 99]),
+            np.array([0.9, 0.3, 0.9, 0.9, 0.8, 0.2, 0.9], dtype=np.float32),
+            np.array([
+                [0.1, 0.1, 0.4, 0.4],       # kept
+                [0.1, 0.1, 0.4, 0.4],       # below min_confidence
+                [0.1, 0.1, 0.105, 0.105],   # below min_box_area
+                [0.5, 0.5, 0.9, 0.9],       # class not in the policy
+                [0.0, 0.0, 0.5, 1.0],       # person
+                [0.5, 0.0, 1.0, 1.0],       # person below PRESENCE_MIN_CONFIDENCE
+                [0.0, 0.0, 1.0, 1.0],       # class id outside the detector's list
+            ], dtype=np.float32),
+        )
+
+        class_ids, confidences, boxes, person_count = policy.evaluate(result)
+        self.assertEqual(class_ids.tolist(), [67])
+        self.assertEqual(boxes.shape, (1, 4))
+        self.assertEqual(person_count, 1)
+
+    def test_empty_result(self):
+        policy = CompiledPolicy(RULES, NAMES)
+        class_ids, _, boxes, person_count = policy.evaluate(None)
+        self.assertEqual((len(class_ids), boxes.shape, person_count), (0, (0, 4), 0))
+
+
+# ===========================================================
+#                   ASGI CAMERA STREAM
+# ===========================================================
+
+class SlowCapture:
+    """VideoCapture stand-in that records a release during a read."""
+
+    def __init__(self, index):
+        self.reading = False
+        self.released_while_reading = None
+
+    def read(self, out=None):
+        self.reading = True
+        time.sleep(0.2)
+        self.reading = False
+        return True, np.zeros((48, 64, 3), dtype=np.uint8)
+
+    def release(self):
+        self.released_while_reading = self.reading
+
+
+class CameraStreamTests(SimpleTestCase):
+    async def test_disconnect_waits_for_the_read_before_release(self):
+        session = ProctoringSession(1, 1, rules=[])
+        session.sample = lambda frame: False
+        captures = []
+
+        def open_capture(index):
+            captures.append(SlowCapture(index))
+            return captures[-1]
+
+        with mock.patch("cv2.VideoCapture", open_capture), \
+                mock.patch.object(ProctoringSession, "afor_exam", mock.AsyncMock(return_value=session)):
+            frames = agen_frames(1, 1)
+            await anext(frames)
+            task = asyncio.ensure_future(anext(frames))
+            await asyncio.sleep(0.05)   # the second read is in progress
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        self.assertIs(captures[0].released_while_reading, False)
+        self.assertFalse(session_registry.release(session))
+
+
+class VideoFeedAccessTests(ProctoringDataMixin, TestCase):
+    def test_no_attempt_in_session_is_forbidden(self):
+        self.client.force_login(self.student)
+        self.assertEqual(self.client.get(reverse("video_feed")).status_code, 403)
+
+    def test_submitted_attempt_gets_no_stream(self):
+        ExamAssignment.objects.filter(id=self.assignment.id).update(submitted=True)
+        self.client.force_login(self.student)
+        session = self.client.session
+        session.update({"student_id": self.student.id, "exam_id": self.exam.id})
+        session.save()
+
+        with mock.patch("exams.views.gen_frames") as frames:
+            self.assertEqual(self.client.get(reverse("video_feed")).status_code, 404)
+        frames.assert_not_called()
+
+
+# ===========================================================
+#                  BACKGROUND WARNING WRITER
+# ===========================================================
+
+@mock.patch.object(WarningWriter, "start")   # flushed synchronously instead
+@mock.patch.object(WarningWriter, "_publish")
+class WarningWriterTests(ProctoringDataMixin, TestCase):
+    def setUp(self):
+        self.writer = WarningWriter(retry_backoff_ms=0)
+        self.candidate = User.objects.create_user("candidate", password="pw", role="STUDENT")
+        self.attempt = ExamAssignment.objects.create(exam=self.exam, student=self.candidate)
+
+    def log(self, object_name, weight=1, seen_at=1000.0, key=""):
+        self.writer.enqueue(
+            self.candidate.id, self.exam.id, object_name, f"{object_name} detected!",
+            weight=weight, seen_at=seen_at, incident_key=key,
+        )
+
+    def test_flush_writes_logs_and_folds_them_into_aggregates(self, publish, start):
+        self.log("cell phone", weight=2, seen_at=1000.0, key="a" * 32)
+        self.log("cell phone", seen_at=1005.0)
+        self.log("book", seen_at=1002.0)
+        self.writer.flush()
+
+        self.assertEqual(WarningLog.objects.filter(student=self.candidate).count(), 3)
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.warning_count, 4)
+        self.assertEqual(self.attempt.first_warning_at.timestamp(), 1000.0)
+        self.assertEqual(self.attempt.last_warning_at.timestamp(), 1005.0)
+        counts = dict(self.attempt.class_counts.values_list("object_name", "count"))
+        self.assertEqual(counts, {"cell phone": 2, "book": 1})
+
+        args = publish.call_args.args
+        self.assertEqual((args[0], args[1], len(args[2]), args[3]), (self.candidate.id, self.exam.id, 3, 4))
+
+        # A second flush adds to the same rows
+        self.log("book", seen_at=1010.0)
+        self.writer.flush()
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.warning_count, 5)
+        self.assertEqual(self.attempt.first_warning_at.timestamp(), 1000.0)
+        self.assertEqual(self.attempt.class_counts.get(object_name="book").count, 2)
+
+    def test_incident_end_and_evidence_update_the_logged_row(self, publish, start):
+        key = "b" * 32
+        self.log("cell phone", key=key)
+        self.writer.end_incident(key, 1012.5, 0.91)
+        self.writer.attach_evidence(key, "c" * 64)
+        self.writer.flush()
+
+        row = WarningLog.objects.get(incident_key=key)
+        self.assertEqual(row.ended_at.timestamp(), 1012.5)
+        self.assertEqual(row.peak_confidence, 0.91)
+        self.assertEqual(row.evidence, "c" * 64)
+
+    def test_failed_batch_is_retried(self, publish, start):
+        self.log("cell phone")
+        with mock.patch.object(self.writer, "_write", side_effect=[OperationalError("database is locked"), None]) as write, \
+                self.assertLogs("exams.warning_writer", "WARNING"):
+            items = [self.writer._queue.get_nowait()]
+            self.assertTrue(self.writer._write_batch(items))
+        self.assertEqual(write.call_count, 2)
+        write.assert_called_with(items)
+
+    def test_batch_is_dropped_after_the_last_attempt(self, publish, start):
+        with mock.patch.object(self.writer, "_write", side_effect=OperationalError("database is locked")) as write, \
+                self.assertLogs("exams.warning_writer", "ERROR"):
+            self.assertFalse(self.writer._write_batch([("end", "k", None, None)]))
+        self.assertEqual(write.call_count, self.writer.retries)
+
+
+class WarningAggregateBackfillTests(ProctoringDataMixin, TestCase):
+    def test_backfill_recounts_warning_count_from_the_logs(self):
+        migration = importlib.import_module("exams.migrations.0008_examassignment_warning_aggregates")
+        self.log_warnings(self.student, 4)
+        WarningLog.objects.create(student=self.student, exam=self.exam, object_name="book", warning_type="Book detected!")
+        other = User.objects.create_user("other", password="pw", role="STUDENT")
+        clean = ExamAssignment.objects.create(exam=self.exam, student=other, warning_count=2)
+
+        migration.backfill_aggregates(apps, None)
+
+        self.assignment.refresh_from_db()
+        clean.refresh_from_db()
+        self.assertEqual(self.assignment.warning_count, 5)   # was 3, out of step with the logs
+        self.assertEqual(clean.warning_count, 0)
+        counts = dict(self.assignment.class_counts.values_list("object_name", "count"))
+        self.assertEqual(counts, {"cell phone": 4, "book": 1})
+        self.assertEqual(sum(counts.values()), self.assignment.warning_count)
+
+
+class DuplicateRemovalTests(TransactionTestCase):
+    """0009 deletes duplicates before adding the unique constraints."""
+
+    def setUp(self):
+        self.migration = importlib.import_module("exams.migrations.0009_proctoring_indexes")
+        # Duplicates can only exist without the constraints that 0009 adds:
+        # rebuild the tables from their state just before it
+        self.apps = MigrationLoader(connection).project_state(
+            ("exams", "0008_examassignment_warning_aggregates")
+        ).apps
+        self.constraints = [(model, model._meta.constraints[0]) for model in (ExamAssignment, Result)]
+        with connection.schema_editor() as editor:
+            for model, constraint in self.constraints:
+                editor.remove_constraint(self.apps.get_model("exams", model.__name__), constraint)
+        teacher = User.objects.create_user("teacher", password="pw", role="TEACHER")
+        self.student = User.objects.create_user("student", password="pw", role="STUDENT")
+        self.exam = Exam.objects.create(teacher=teacher, title="Algebra", duration=30, total_marks=10)
+
+    def tearDown(self):
+        with connection.schema_editor() as editor:
+            for model, constraint in self.constraints:
+                editor.add_constraint(model, constraint)
+
+    def test_identical_duplicates_are_logged_and_deleted(self):
+        kept_assignment = ExamAssignment.objects.create(exam=self.exam, student=self.student, submitted=True)
+        ExamAssignment.objects.create(exam=self.exam, student=self.student, warning_count=2)
+        Result.objects.create(exam=self.exam, student=self.student, score=7, total_marks=10)
+        kept_result = Result.objects.create(exam=self.exam, student=self.student, score=7, total_marks=10)
+
+        with self.assertLogs(self.migration.logger, "WARNING") as logs:
+            self.migration.remove_duplicates(self.apps, None)
+
+        self.assertEqual(list(ExamAssignment.objects.values_list("id", flat=True)), [kept_assignment.id])
+        self.assertEqual(list(Result.objects.values_list("id", flat=True)), [kept_result.id])
+        self.assertEqual(len(logs.records), 2)
+        self.assertIn("'warning_count': 2", logs.output[1])
+
+    def test_conflicting_scores_fail_without_deleting(self):
+        ExamAssignment.objects.create(exam=self.exam, student=self.student)
+        ExamAssignment.objects.create(exam=self.exam, student=self.student)
+        Result.objects.create(exam=self.exam, student=self.student, score=7, total_marks=10)
+        Result.objects.create(exam=self.exam, student=self.student, score=4, total_marks=10)
+
+        with self.assertRaisesMessage(RuntimeError, "Resolve them manually"):
+            self.migration.remove_duplicates(self.apps, None)
+
+        self.assertEqual(Result.objects.count(), 2)
+        self.assertEqual(ExamAssignment.objects.count(), 2)
+
+        # Teardown re-adds the constraints, which needs the data to be unique again
+        Result.objects.filter(score=4).delete()
+        ExamAssignment.objects.filter(id=ExamAssignment.objects.order_by("id").last().id).delete()
+
+
+class ConcurrentWarningFlushTests(TransactionTestCase):
+    """Several writers (one per worker process in production) flushing at once."""
+
+    def test_concurrent_flushes_add_up(self):
+        teacher = User.objects.create_user("teacher", password="pw", role="TEACHER")
+        student = User.objects.create_user("student", password="pw", role="STUDENT")
+        exam = Exam.objects.create(teacher=teacher, title="Algebra", duration=30, total_marks=10)
+        assignment = ExamAssignment.objects.create(exam=exam, student=student)
+
+        writers, rounds = 4, 5
+        barrier = threading.Barrier(writers)
+        errors = []
+
+        def flush_many(index):
+            writer = WarningWriter(retries=20, retry_backoff_ms=20)
+            try:
+                barrier.wait()
+                for i in range(rounds):
+                    for object_name in ("cell phone", "book"):
+                        writer._queue.put((
+                            "log", student.id, exam.id, object_name, f"{object_name} detected!",
+                            1, timezone.now(), "", None,
+                        ))
+                    if not writer._write_batch([writer._queue.get_nowait(), writer._queue.get_nowait()]):
+                        errors.append(index)
+            finally:
+                connection.close()
+
+        # SQLite serializes the writers; lock errors are retried quietly
+        with mock.patch.object(WarningWriter, "_publish"), mock.patch("exams.warning_writer.logger"):
+            threads = [threading.Thread(target=flush_many, args=(i,)) for i in range(writers)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        self.assertEqual(errors, [])
+        assignment.refresh_from_db()
+        self.assertEqual(assignment.warning_count, writers * rounds * 2)
+        counts = dict(assignment.class_counts.values_list("object_name", "count"))
+        self.assertEqual(counts, {"cell phone": writers * rounds, "book": writers * rounds})
+        self.assertEqual(WarningLog.objects.filter(student=student).count(), writers * rounds * 2)
+
+
+# ===========================================================
+#                    GRADING QUEUE
+# ===========================================================
+
+@mock.patch.object(GradingQueue, "start")   # jobs are processed inline
+class GradingQueueTests(ProctoringDataMixin, TestCase):
+    def setUp(self):
+        self.queue = GradingQueue(workers=1, max_attempts=3)
+        self.candidate = User.objects.create_user("candidate", password="pw", role="STUDENT")
+        self.attempt = ExamAssignment.objects.create(exam=self.exam, student=self.candidate)
+
+    def test_same_idempotency_key_maps_to_one_job(self, start):
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.queue.submit(self.attempt, {}, "key-1")
+        second = self.queue.submit(self.attempt, {"1": "A"}, "key-1")
+
+        self.assertEqual(first.id, second.id)
+        self.assertEqual(SubmissionJob.objects.count(), 1)
+        # The duplicate re-offers the waiting job, but it is queued once
+        self.assertEqual(self.queue.pending(), 1)
+
+    def test_pending_job_is_resumed_after_a_restart(self, start):
+        job = SubmissionJob.objects.create(idempotency_key="key-2", assignment=self.attempt)
+        self.queue.resume(job)
+        self.assertEqual(self.queue._take(), job.id)
+
+    def test_job_is_claimed_and_graded_once(self, start):
+        job = SubmissionJob.objects.create(idempotency_key="key-3", assignment=self.attempt)
+        self.queue.process(job.id)
+        self.queue.process(job.id)   # duplicate queue entry: the claim fails
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("DONE", 1))
+        self.assertIsNotNone(job.result)
+        self.assertEqual(Result.objects.filter(student=self.candidate).count(), 1)
+
+    @mock.patch("exams.submission_queue.time.sleep")
+    @mock.patch("exams.submission_queue.grade_submission", side_effect=RuntimeError("grader down"))
+    def test_failing_job_is_retried_then_marked_failed(self, grade, sleep, start):
+        job = SubmissionJob.objects.create(idempotency_key="key-4", assignment=self.attempt)
+
+        for attempt in range(1, 4):
+            self.queue.process(self.queue._take() if attempt > 1 else job.id)
+            job.refresh_from_db()
+            self.assertEqual(job.attempts, attempt)
+
+        self.assertEqual(job.status, "FAILED")
+        self.assertEqual(job.error, "grader down")
+        self.assertEqual(self.queue.pending(), 0)
+
+
+# ===========================================================
+#                    QUESTION CACHE
+# ===========================================================
+
+class QuestionCacheTests(ProctoringDataMixin, TestCase):
+    def setUp(self):
+        # Exam ids repeat across test cases; start from an empty cache
+        question_cache.invalidate(self.exam.id)
+
+    def add_question(self, correct="A"):
+        return Question.objects.create(
+            exam=self.exam, question_text="2 + 2?", option_a="4", option_b="5", option_c="6", option_d="7",
+            correct_option=correct, marks=2,
+        )
+
+    def questions(self):
+        self.exam.refresh_from_db()
+        return get_exam_questions(self.exam)
+
+    def test_question_save_and_delete_reload_the_cached_exam(self):
+        question = self.add_question()
+        self.assertEqual(len(self.questions().answer_key), 1)
+        with self.assertNumQueries(1):   # exam refresh only: served from the cache
+            self.questions()
+
+        version = self.exam.question_version
+        question.correct_option = "B"
+        question.save()
+        self.assertEqual(self.questions().answer_key, ((question.id, "B", 2),))
+        self.assertGreater(self.exam.question_version, version)
+
+        question.delete()
+        self.assertEqual(self.questions().answer_key, ())
+
+    def test_entries_and_load_locks_stay_bounded(self):
+        cache = QuestionCache(max_entries=2)
+        for exam_id in range(1000):
+            cache._put_local((exam_id, 0), ExamQuestions([], ()))
+            self.assertIs(cache._load_lock(exam_id), cache._load_lock(exam_id))
+
+        self.assertEqual(list(cache._entries), [(998, 0), (999, 0)])
+        self.assertEqual(len(cache._load_locks), QuestionCache.LOAD_LOCK_STRIPES)
+
+
+# ===========================================================
+#                    FRAME RING
+# ===========================================================
+
+class FrameRingTests(SimpleTestCase):
+    def test_frames_are_written_into_reused_slots(self):
+        ring = FrameRing(slots=3)
+        self.assertEqual(ring.claim(), (0, None))   # shape not known yet
+
+        views = []
+        for value in range(5):
+            seq, slot = ring.claim()
+            frame = np.full((4, 4, 3), value, dtype=np.uint8)
+            if slot is not None:
+                slot[:] = frame   # capture fills the claimed slot in place
+                frame = slot
+            published, view = ring.publish(seq, frame)
+            self.assertEqual(published, value)
+            views.append(view)
+
+        # Round-robin: frame 3 reused frame 0's slot, with no new allocation
+        self.assertTrue(np.shares_memory(views[0], views[3]))
+        self.assertEqual(ring.buffer.shape, (3, 4, 4, 3))
+        # The newest slots - 1 frames are still intact
+        self.assertEqual([int(v[0, 0, 0]) for v in views[-2:]], [3, 4])
+
+    def test_publish_copies_foreign_frames_and_reallocates_on_resize(self):
+        ring = FrameRing(slots=2, shape=(4, 4, 3))
+        frame = np.ones((4, 4, 3), dtype=np.uint8)
+        _, view = ring.publish(ring.claim()[0], frame)
+        self.assertFalse(np.shares_memory(view, frame))
+        self.assertTrue((view == 1).all())
+
+        _, view = ring.publish(ring.claim()[0], np.zeros((8, 8, 3), dtype=np.uint8))
+        self.assertEqual(ring.buffer.shape, (2, 8, 8, 3))
+
+
+# ===========================================================
+#                ONNX DETECTOR PRE/POST-PROCESSING
+# ===========================================================
+
+class OnnxDetectorTests(SimpleTestCase):
+    """Letterboxing and decoding are pure NumPy; no model is loaded."""
+
+    def make_detector(self, size=640):
+        detector = OnnxDetector.__new__(OnnxDetector)
+        detector.input_h = detector.input_w = size
+        detector.conf_threshold = 0.25
+        detector.iou_threshold = 0.45
+        detector._canvas = detector._input = None
+        return detector
+
+    def test_letterbox_geometry_and_channel_order(self):
+        detector = self.make_detector()
+        frame = np.empty((480, 640, 3), dtype=np.uint8)
+        frame[:] = (10, 20, 30)   # BGR
+
+        blob, geometry = detector.letterbox([frame])
+
+        self.assertEqual(blob.shape, (1, 3, 640, 640))
+        self.assertEqual(geometry, [(1.0, 0, 80, 640, 480)])
+        self.assertAlmostEqual(blob[0, 0, 320, 320], 30 / 255, places=5)   # RGB
+        self.assertAlmostEqual(blob[0, 2, 320, 320], 10 / 255, places=5)
+        self.assertAlmostEqual(blob[0, 0, 10, 320], 114 / 255, places=5)  # padding
+
+    def raw_head(self, boxes):
+        """(4 + 2 classes, anchors) output from (cx, cy, w, h, class, conf) rows."""
+        pred = np.zeros((6, len(boxes)), dtype=np.float32)
+        for i, (cx, cy, w, h, cls, conf) in enumerate(boxes):
+            pred[:4, i] = (cx, cy, w, h)
+            pred[4 + cls, i] = conf
+        return pred
+
+    def test_raw_head_is_suppressed_per_class_and_unmapped(self):
+        detector = self.make_detector()
+        pred = self.raw_head([
+            (320, 320, 64, 64, 0, 0.9),
+            (322, 321, 64, 64, 0, 0.8),   # duplicate of the first: suppressed
+            (320, 320, 64, 64, 1, 0.7),   # same place, other class: kept
+            (100, 200, 20, 20, 0, 0.1),   # below the confidence threshold
+        ])
+
+        result = detector._decode(pred, 1.0, 0, 80, 640, 480)
+
+        self.assertEqual(sorted(result.cls.tolist()), [0, 1])
+        self.assertEqual(result.xyxyn.shape, (2, 4))
+        np.testing.assert_allclose(result.xyxyn[0], [288 / 640, 208 / 480, 352 / 640, 272 / 480], rtol=1e-5)
+        self.assertEqual(result.conf.max(), np.float32(0.9))
+
+    def test_raw_head_with_nothing_above_threshold(self):
+        detector = self.make_detector()
+        result = detector._decode(self.raw_head([(320, 320, 64, 64, 0, 0.1)]), 1.0, 0, 80, 640, 480)
+
+        self.assertEqual(len(result), 0)
+        self.assertEqual(result.xyxyn.shape, (0, 4))
+
+    def test_end_to_end_head_is_unmapped_without_nms(self):
+        detector = self.make_detector()
+        pred = np.array([
+            [0, 80, 320, 560, 0.8, 67],
+            [0, 80, 640, 560, 0.1, 0],
+        ], dtype=np.float32)
+
+        result = detector._decode(pred, 1.0, 0, 80, 640, 480)
+
+        self.assertEqual(result.cls.tolist(), [67])
+        np.testing.assert_allclose(result.xyxyn, [[0.0, 0.0, 0.5, 1.0]])
+
+
+# ===========================================================
+#                      EVIDENCE SNAPSHOTS
+# ===========================================================
+
+def gradient_frame(flip=False):
+    ramp = np.tile(np.linspace(0, 255, 400, dtype=np.uint8), (300, 1))
+    frame = np.dstack([ramp] * 3)
+    return frame[:, ::-1].copy() if flip else frame
+
+
+class EvidenceStoreTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.store = EvidenceStore(self.root, width=160)
+
+    def test_snapshot_is_written_to_its_sharded_path(self):
+        digest = self.store.store(1, 1, gradient_frame())
+
+        self.assertRegex(digest, DIGEST_RE)
+        path = self.store.path(digest)
+        self.assertEqual(path, os.path.join(self.root, digest[:2], digest[2:4], f"{digest}.jpg"))
+        with open(path, "rb") as fh:
+            self.assertEqual(hashlib.sha256(fh.read()).hexdigest(), digest)
+
+    def test_near_duplicate_reuses_the_earlier_digest(self):
+        first = self.store.store(1, 1, gradient_frame())
+        noisy = gradient_frame()
+        noisy[::7, ::7] ^= 1   # sensor noise, not a new scene
+        self.assertEqual(self.store.store(1, 1, noisy), first)
+
+        self.assertNotEqual(self.store.store(1, 1, gradient_frame(flip=True)), first)
+        written = [name for _, _, names in os.walk(self.root) for name in names]
+        self.assertEqual(len(written), 2)
+
+
+class EvidenceSnapshotViewTests(ProctoringDataMixin, TestCase):
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        store = EvidenceStore(root)
+        patcher = mock.patch("exams.views.evidence_store", store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.digest = store.store(self.student.id, self.exam.id, gradient_frame())
+        WarningLog.objects.create(
+            student=self.student, exam=self.exam, object_name="cell phone",
+            warning_type="Cell phone detected!", evidence=self.digest,
+        )
+        self.url = reverse("evidence_snapshot", args=[self.digest])
+
+    def test_owner_gets_the_snapshot_then_304(self):
+        self.client.force_login(self.teacher)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["ETag"], f'"{self.digest}"')
+        self.assertEqual(hashlib.sha256(b"".join(response.streaming_content)).hexdigest(), self.digest)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"{self.digest}"')
+        self.assertEqual(response.status_code, 304)
+
+    def test_other_teachers_digest_is_404(self):
+        other = User.objects.create_user("other-teacher", password="pw", role="TEACHER")
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+        # Even a matching ETag reveals nothing
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=f'"{self.digest}"').status_code, 404)
+
+    def test_malformed_digest_is_404(self):
+        self.client.force_login(self.teacher)
+        for digest in ("abc", self.digest.upper(), "g" + self.digest[1:]):
+            with self.subTest(digest):
+                # Resolves to the view, which rejects it before any lookup
+                self.assertEqual(resolve(f"/teacher/evidence/{digest}.jpg").func, evidence_snapshot)
+                self.assertEqual(self.client.get(f"/teacher/evidence/{digest}.jpg").status_code, 404)
+
+    def test_students_are_forbidden(self):
+        self.client.force_login(self.student)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+# ===========================================================
+#                    PROMETHEUS METRICS
+# ===========================================================
+
+class MetricsExpositionTests(SimpleTestCase):
+    def test_histogram_lines_are_cumulative(self):
+        registry = MetricsRegistry(enabled=True)
+        histogram = registry.histogram("wait_seconds", "Wait.", ["stage"], buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 3.0):
+            histogram.observe(value, "decode")
+
+        lines = registry.render().splitlines()
+        self.assertEqual(lines[:2], ["# HELP wait_seconds Wait.", "# TYPE wait_seconds histogram"])
+        self.assertEqual(lines[2:], [
+            'wait_seconds_bucket{stage="decode",le="0.1"} 1',
+            'wait_seconds_bucket{stage="decode",le="1.0"} 3',
+            'wait_seconds_bucket{stage="decode",le="+Inf"} 4',
+            'wait_seconds_sum{stage="decode"} 4.25',
+            'wait_seconds_count{stage="decode"} 4',
+        ])
+
+    def test_label_values_are_escaped(self):
+        registry = MetricsRegistry(enabled=True)
+        counter = registry.counter("detections_total", "Detections.", ["object"])
+        counter.inc('say "hi"\\\n')
+        counter.inc('say "hi"\\\n', amount=2)
+
+        self.assertIn('detections_total{object="say \\"hi\\"\\\\\\n"} 3', registry.render())
+
+    def test_disabled_registry_records_nothing(self):
+        registry = MetricsRegistry(enabled=False)
+        counter = registry.counter("frames_total", "Frames.")
+        counter.inc()
+        with registry.histogram("t", "T.").time():
+            pass
+        self.assertTrue(all(line.startswith("#") for line in registry.render().splitlines()))
+
+
+class MetricsEndpointTests(SimpleTestCase):
+    def test_404_while_disabled(self):
+        with mock.patch.object(metrics, "enabled", False):
+            self.assertEqual(self.client.get(reverse("metrics")).status_code, 404)
+
+    @override_settings(METRICS_TOKEN="s3cret")
+    def test_bearer_token_is_required(self):
+        with mock.patch.object(metrics, "enabled", True), \
+                mock.patch("exams.metrics._queue_depths", return_value={}), \
+                mock.patch("exams.metrics._session_counts", return_value={}):
+            self.assertEqual(self.client.get(reverse("metrics")).status_code, 403)
+            self.assertEqual(
+                self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer wrong").status_code, 403
+            )
+            response = self.client.get(reverse("metrics"), HTTP_AUTHORIZATION="Bearer s3cret")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        self.assertIn(b"# TYPE proctoring_frames_total counter", response.content)
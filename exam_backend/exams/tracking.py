@@ -0,0 +1,139 @@
+# ========================= IMPORTS =========================
+
+import uuid
+from collections import deque
+
+from django.conf import settings
+
+
+# ===========================================================
+#                 INCIDENT TRACKING / DE-DUPLICATION
+# ===========================================================
+
+class Track:
+    def __init__(self, class_id, box, confidence, now, window):
+        self.key = uuid.uuid4().hex
+        self.class_id = class_id
+        self.box = box
+        self.peak = confidence
+        self.first_seen = now
+        self.last_seen = now
+        self.hits = deque([True], maxlen=window)
+        self.confirmed = False
+
+
+def iou(a, b):
+    """IoU of two (x1, y1, x2, y2) boxes."""
+    ix = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+class IncidentTracker:
+    """
+    Turns per-frame detections into incidents.
+
+    Boxes are associated with existing tracks of the same class by IoU
+    across sampled frames. A track becomes an incident once it is seen in
+    ``confirm_hits`` of the last ``window`` detections, so a single
+    spurious frame never counts. It ends once unseen for ``end_after``
+    seconds (or the class cooldown, if longer); reappearing within that
+    time continues the same incident.
+    """
+
+    def __init__(self, iou_threshold=None, confirm_hits=None, window=None, end_after=None):
+        self.iou_threshold = iou_threshold or getattr(settings, "TRACKING_IOU_THRESHOLD", 0.3)
+        self.confirm_hits = confirm_hits or getattr(settings, "TRACKING_CONFIRM_HITS", 2)
+        self.window = max(self.confirm_hits, window or getattr(settings, "TRACKING_WINDOW", 3))
+        self.end_after = end_after or getattr(settings, "TRACKING_END_AFTER_SECONDS", 3.0)
+
+        self.tracks = []
+
+    def update(self, class_ids, confidences, boxes, now, cooldowns=None):
+        """
+        Feed one sampled frame's filtered detections (parallel sequences).
+        Returns ``(started, ended)`` lists of Tracks.
+        """
+        detections = list(zip(class_ids, confidences, boxes))
+        matched = set()
+        unmatched = []
+
+        # 1. Greedy IoU association, best overlaps first
+        pairs = sorted(
+            (
+                (iou(track.box, box), t, d)
+                for t, track in enumerate(self.tracks)
+                for d, (class_id, _, box) in enumerate(detections)
+                if track.class_id == class_id
+            ),
+            reverse=True,
+        )
+        assigned = {}
+        for overlap, t, d in pairs:
+            if overlap < self.iou_threshold:
+                break
+            if t not in matched and d not in assigned:
+                matched.add(t)
+                assigned[d] = t
+
+        for d, detection in enumerate(detections):
+            if d in assigned:
+                self._hit(self.tracks[assigned[d]], detection, now)
+            else:
+                unmatched.append(detection)
+
+        # 2. Re-acquire a lost track of the same class (the object moved),
+        #    otherwise start a new candidate track
+        for class_id, confidence, box in unmatched:
+            lost = next(
+                (t for t, track in enumerate(self.tracks)
+                 if t not in matched and track.class_id == class_id),
+                None,
+            )
+            if lost is not None:
+                matched.add(lost)
+                self._hit(self.tracks[lost], (class_id, confidence, box), now)
+            else:
+                self.tracks.append(Track(class_id, box, confidence, now, self.window))
+                matched.add(len(self.tracks) - 1)
+
+        # 3. Confirm, expire and drop
+        started, ended, alive = [], [], []
+        for t, track in enumerate(self.tracks):
+            if t not in matched:
+                track.hits.append(False)
+
+            if not track.confirmed:
+                if sum(track.hits) >= self.confirm_hits:
+                    track.confirmed = True
+                    started.append(track)
+                elif len(track.hits) == self.window and not any(track.hits):
+                    continue  # never confirmed: spurious
+            else:
+                timeout = self.end_after
+                if cooldowns is not None:
+                    timeout = max(timeout, float(cooldowns[track.class_id]))
+                if now - track.last_seen > timeout:
+                    ended.append(track)
+                    continue
+
+            alive.append(track)
+
+        self.tracks = alive
+        return started, ended
+
+    def close(self):
+        """End every open incident (the session is going away)."""
+        ended = [track for track in self.tracks if track.confirmed]
+        self.tracks = []
+        return ended
+
+    @staticmethod
+    def _hit(track, detection, now):
+        _, confidence, box = detection
+        track.box = box
+        track.last_seen = now
+        track.peak = max(track.peak, confidence)
+        track.hits.append(True)
@@ -3,10 +3,16 @@ from django.urls import path
 from users import views
 from .views import (
     admin_dashboard,
+    ops_sessions,
+    metrics_endpoint,
     all_integrity_logs,
+    integrity_log_timeline,
+    evidence_snapshot,
+    live_wall,
     teacher_assign_exam,
     exam_results,
     student_result,
+    submission_status,
     teacher_dashboard,
     student_dashboard,
     create_exam,
@@ -19,6 +25,8 @@ from .views import (
 
 urlpatterns = [
     path("admin/dashboard/", admin_dashboard, name="admin_dashboard"),
+    path("admin/ops/sessions/", ops_sessions, name="ops_sessions"),
+    path("metrics/", metrics_endpoint, name="metrics"),
     path("teacher/dashboard/", teacher_dashboard, name="teacher_dashboard"),
     path("student/dashboard/", student_dashboard, name="student_dashboard"),
 
@@ -29,9 +37,13 @@ urlpatterns = [
     path("admin/assign-exam/", teacher_assign_exam, name="teacher_assign_exam"),
     path("teacher/results/<int:exam_id>/", exam_results, name="exam_results"),
     path("student/result/<int:exam_id>/", student_result, name="student_result"),
+    path("student/submission/<str:key>/", submission_status, name="submission_status"),
     path("teacher/exam/<int:exam_id>/questions/", view_questions, name="view_questions"),
+    path("teacher/exam/<int:exam_id>/live/", live_wall, name="live_wall"),
     # path("teacher/logs/",teacher_logs,name="teacher_logs"),
     path("video_feed/", video_feed, name="video_feed"),
     path('teacher/integrity-logs/', all_integrity_logs, name='all_integrity_logs'),
+    path('teacher/integrity-logs/<int:exam_id>/<int:student_id>/', integrity_log_timeline, name='integrity_log_timeline'),
+    path('teacher/evidence/<str:digest>.jpg', evidence_snapshot, name='evidence_snapshot'),
 
 ]
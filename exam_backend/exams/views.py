@@ -1,19 +1,36 @@
 # ========================= IMPORTS =========================
 
+import asyncio
+import uuid
+
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import redirect, render, get_object_or_404
+from django.core.handlers.asgi import ASGIRequest
+from django.core.paginator import Paginator
 from django.db.models import Count
+from django.urls import reverse
+from django.utils import timezone
 
-from .models import Exam, ExamAssignment, Question, Result, WarningLog
+from .models import Exam, ExamAssignment, Question, Result, SubmissionJob, WarningLog
 from users.models import User
 
 
-from django.http import JsonResponse, StreamingHttpResponse
-import cv2
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseForbidden, HttpResponseNotModified, JsonResponse,
+    StreamingHttpResponse,
+)
+
+from django.conf import settings
 
-from channels.layers import get_channel_layer
-from asgiref.sync import async_to_sync
-from ultralytics import YOLO
+from .evidence import DIGEST_RE, evidence_store
+from .grading import grade_submission
+from .frame_ring import FrameRing
+from .preview import PreviewEncoder
+from .proctoring import ProctoringSession, stream_executor
+from .metrics import CAPTURE_SECONDS, metrics
+from .question_cache import get_exam_questions
+from .session_registry import session_registry
+from .submission_queue import grading_queue
 
 
 # ===========================================================
@@ -34,6 +51,37 @@ def admin_dashboard(request):
     })
 
 
+@login_required
+def ops_sessions(request):
+    """Live proctoring pipelines on this node, plus background queue depths."""
+    if request.user.role != "ADMIN":
+        return JsonResponse({"error": "forbidden"}, status=403)
+
+    from .inference import inference_server
+    from .warning_writer import warning_writer
+
+    state = session_registry.snapshot()
+    state["queues"] = {
+        "inference": inference_server.pending(),
+        "warning_writer": warning_writer.pending(),
+        "evidence": evidence_store.pending(),
+        "grading": grading_queue.pending(),
+    }
+    return JsonResponse(state)
+
+
+def metrics_endpoint(request):
+    """Prometheus text exposition of the proctoring hot-path metrics."""
+    if not metrics.enabled:
+        raise Http404
+
+    token = getattr(settings, "METRICS_TOKEN", "")
+    if token and request.headers.get("Authorization") != f"Bearer {token}":
+        return HttpResponseForbidden()
+
+    return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 # ===========================================================
 #                       TEACHER DASHBOARD
 # ===========================================================
@@ -143,7 +191,7 @@ def teacher_assign_exam(request):
         "students": students
     })
 
-from .models import StudentAnswer
+
 # ===========================================================
 #                       ATTEMPT EXAM
 # ===========================================================
@@ -153,67 +201,50 @@ def attempt_exam(request, exam_id):
         return redirect("login")
 
     # 1. Fetch the assignment and validate
-    assignment = ExamAssignment.objects.filter(exam_id=exam_id, student=request.user).first()
+    assignment = ExamAssignment.objects.select_related("exam").filter(exam_id=exam_id, student=request.user).first()
     
     if not assignment or assignment.submitted: 
         return redirect("student_dashboard")
 
+    # A queued submission is waiting for a grading worker
+    if getattr(settings, "ASYNC_GRADING", False):
+        job = assignment.submission_jobs.exclude(status="FAILED").first()
+        if job:
+            return redirect("submission_status", key=job.idempotency_key)
+
     exam = assignment.exam
-    questions = Question.objects.filter(exam=exam)
 
     # 2. AJAX WARNING FETCH + AUTO-SUBMIT CHECK
+    # The count comes from the assignment's aggregate row; the recent list
+    # is only fetched when the client's known count is stale.
     if request.headers.get("X-Requested-With") == "XMLHttpRequest":
-        warnings_qs = WarningLog.objects.filter(student=request.user, exam_id=exam_id).order_by('-timestamp')
-        count = warnings_qs.count()
-        
-        data = [{
-            "object_name": w.object_name,
-            "warning_type": w.warning_type,
-            "timestamp": w.timestamp.strftime("%H:%M:%S")
-        } for w in warnings_qs[:10]]
+        count = assignment.warning_count
+        data = None
+
+        if request.GET.get("known") != str(count):
+            warnings_qs = WarningLog.objects.filter(student=request.user, exam_id=exam_id).order_by('-timestamp')
+            data = [{
+                "object_name": w.object_name,
+                "warning_type": w.warning_type,
+                "timestamp": w.timestamp.strftime("%H:%M:%S")
+            } for w in warnings_qs[:10]]
 
         return JsonResponse({
             "warnings": data, 
             "total_count": count,
-            "should_submit": count >= 10  # This signals the frontend to auto-submit
+            "should_submit": assignment.warning_limit_reached  # This signals the frontend to auto-submit
         })
 
     # 3. HANDLING EXAM SUBMISSION (POST Request)
     if request.method == "POST":
-        score = 0
-        total_m = 0
-
-        for q in questions:
-            selected = request.POST.get(str(q.id))
-            total_m += q.marks
-            if selected == q.correct_option:
-                score += q.marks
-            
-            # Save individual answers if you want to track them
-            StudentAnswer.objects.create(
-                exam=exam,
-                question=q,
-                student=request.user,
-                selected_option=selected if selected else ""
-            )
-
-        # Create the Result record
-        # Note: If count >= 10, you can flag this as 'is_terminated=True'
-        warning_count = WarningLog.objects.filter(student=request.user, exam_id=exam_id).count()
-        
-        Result.objects.create(
-            exam=exam,
-            student=request.user,
-            score=score,
-            total_marks=total_m,
-            is_terminated=(warning_count >= 10)
-        )
-
-        # Mark assignment as finished
-        assignment.submitted = True
-        assignment.warning_count = warning_count
-        assignment.save()
-
+        if getattr(settings, "ASYNC_GRADING", False):
+            # Accept instantly; a grading worker picks it up from the queue
+            answers = {k: v for k, v in request.POST.items() if k.isdigit()}
+            key = request.POST.get("submission_key") or uuid.uuid4().hex
+            job = grading_queue.submit(assignment, answers, key)
+            return redirect("submission_status", key=job.idempotency_key)
+
+        grade_submission(assignment, request.POST)
         return redirect("student_dashboard")
 
     # 4. INITIAL PAGE LOAD (GET Request)
@@ -224,8 +255,46 @@ def attempt_exam(request, exam_id):
 
     return render(request, "exam_page.html", {
         "exam": exam,
-        "questions": questions,
+        "questions": get_exam_questions(exam).questions,
         "warnings": initial_warnings,
+        "submission_key": uuid.uuid4().hex,
+        "capture": {
+            "mode": getattr(settings, "PROCTORING_CAPTURE_MODE", "server"),
+            "preview": getattr(settings, "PREVIEW_ENABLED", True),
+            "width": getattr(settings, "INGEST_FRAME_WIDTH", 640),
+            "height": getattr(settings, "INGEST_FRAME_HEIGHT", 480),
+            "interval_ms": 1000 // max(1, getattr(settings, "CLIENT_CAPTURE_FPS", 10)),
+            "quality": getattr(settings, "CLIENT_CAPTURE_JPEG_QUALITY", 0.7),
+        },
+    })
+
+
+# ===========================================================
+#                   QUEUED SUBMISSION STATUS
+# ===========================================================
+
+@login_required
+def submission_status(request, key):
+    if request.user.role != "STUDENT":
+        return redirect("login")
+
+    job = get_object_or_404(
+        SubmissionJob.objects.select_related("assignment"),
+        idempotency_key=key,
+        assignment__student=request.user,
+    )
+    # Picks the job back up if this process restarted since it was queued
+    if job.status in ("PENDING", "PROCESSING"):
+        grading_queue.resume(job)
+
+    if request.headers.get("X-Requested-With") == "XMLHttpRequest":
+        return JsonResponse({
+            "status": job.status,
+            "attempts": job.attempts,
+        })
+
+    return render(request, "submission_status.html", {
+        "job": job,
     })
 
 # ===========================================================
@@ -255,8 +324,10 @@ def student_result(request, exam_id):
     if request.user.role != "STUDENT":
         return redirect("login")
 
+    # The template shows the exam title
     result = (
         Result.objects
+        .select_related("exam")
         .filter(exam_id=exam_id, student=request.user)
         .order_by("-id")
         .first()
@@ -280,7 +351,7 @@ def view_questions(request, exam_id):
         return redirect("login")
 
     exam = get_object_or_404(Exam, id=exam_id, teacher=request.user)
-    questions = exam.questions.all().order_by("id")
+    questions = get_exam_questions(exam).questions
 
     return render(request, "view_questions.html", {
         "exam": exam,
@@ -315,130 +386,227 @@ def proctoring_view(request):
 #                       YOLO MODEL + VIDEO STREAM
 # ===========================================================
 
-channel_layer = get_channel_layer()
-model = YOLO("yolo26n.pt")
+def capture_frame(cap, ring, session, preview):
+    """
+    Capture one frame straight into the next preallocated ring slot and
+    run the per-frame steps. Returns ``(frame, sampled, chunk)``, with
+    ``frame`` None once the camera stops.
+    """
+    seq, slot = ring.claim()
+    with CAPTURE_SECONDS.time():
+        ret, frame = cap.read(slot) if slot is not None else cap.read()
+    if not ret:
+        return None, False, None
+    seq, frame = ring.publish(seq, frame)
 
+    # The preview has its own resolution, quality and frame rate
+    return frame, session.sample(frame), preview.encode(frame)
 
-# ... (Imports remain same)
-
-import time # Add this at the top of views.py
 
 def gen_frames(student_id, exam_id):
-    cap = cv2.VideoCapture(0)
-    student = User.objects.get(id=student_id)
-    exam = Exam.objects.get(id=exam_id)
-    
-    frame_count = 0
-    last_log_time = 0
-    log_cooldown = 2  # Minimum seconds between saving warnings
-
-    while True:
-        ret, frame = cap.read()
-        if not ret: break
-
-        frame_count += 1
-        
-        # 1. ONLY PROCESS EVERY 10th FRAME (Reduces CPU load)
-        if frame_count % 10 == 0:
-            results = model(frame, stream=True)
-            
-            for r in results:
-                for box in r.boxes:
-                    cls = int(box.cls[0])
-                    label = model.names[cls]
-                    ALERT_OBJECTS = ["cell phone", "book", "notebook"]
-
-                    if label in ALERT_OBJECTS:
-                        current_time = time.time()
-                        
-                        # 2. COOLDOWN: Only save to DB if 2 seconds have passed
-                        if current_time - last_log_time > log_cooldown:
-                            WarningLog.objects.create(
-                                student=student,
-                                exam=exam,
-                                object_name=label,
-                                warning_type=f"{label.capitalize()} detected!"
-                            )
-                            
-                            assignment = ExamAssignment.objects.filter(student=student, exam=exam).first()
-                            if assignment:
-                                assignment.warning_count += 1
-                                assignment.save()
-                                
-                            last_log_time = current_time # Reset cooldown timer
-
-        # Stream the frame (always stream, even if we skip detection)
-        ret, buffer = cv2.imencode('.jpg', frame)
-        yield (b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + buffer.tobytes() + b'\r\n')
-
-def video_feed(request):
+    import cv2
+
+    session = ProctoringSession.for_exam(student_id, exam_id)
+    preview = PreviewEncoder()
+    ring = FrameRing()
+    cap = None
+
+    try:
+        session_registry.admit(session, "server")
+        cap = cv2.VideoCapture(0)
+
+        # Stops when another tab or reload takes over this attempt
+        while session.active:
+            frame, sampled, chunk = capture_frame(cap, ring, session, preview)
+            if frame is None: break
+
+            # Detection always runs on the full-resolution frame
+            if sampled:
+                session.detect(frame)
+
+            if chunk is not None:
+                yield chunk
+    finally:
+        if cap is not None:
+            cap.release()
+        session.close()
+
+
+async def agen_frames(student_id, exam_id):
+    """
+    ``gen_frames`` for ASGI: capture runs on the bounded stream_executor
+    and detection is awaited, so an idle stream holds no thread at all.
+    """
+    import cv2
+
+    loop = asyncio.get_running_loop()
+    session = await ProctoringSession.afor_exam(student_id, exam_id)
+    preview = PreviewEncoder()
+    ring = FrameRing()
+    cap = None
+    # The capture call running on stream_executor. A disconnect cancels our
+    # await, not the thread, so it is shielded and finished before release:
+    # VideoCapture must never be released in the middle of a read.
+    pending = None
+
+    try:
+        # Inside the try so a failed or cancelled open still releases the slot
+        session_registry.admit(session, "server")
+        pending = loop.run_in_executor(stream_executor, cv2.VideoCapture, 0)
+        cap = await asyncio.shield(pending)
+
+        while session.active:
+            pending = loop.run_in_executor(stream_executor, capture_frame, cap, ring, session, preview)
+            frame, sampled, chunk = await asyncio.shield(pending)
+            if frame is None: break
+
+            if sampled:
+                await session.adetect(frame)
+
+            if chunk is not None:
+                yield chunk
+    finally:
+        if pending is not None:
+            await asyncio.wait({pending})
+            if cap is None and not pending.cancelled() and pending.exception() is None:
+                cap = pending.result()   # cancelled while the camera was opening
+        if cap is not None:
+            await loop.run_in_executor(stream_executor, cap.release)
+        session.close()
+
+
+async def video_feed(request):
     # Get IDs from session set in attempt_exam
-    student_id = request.session.get("student_id")
-    exam_id = request.session.get("exam_id")
-    return StreamingHttpResponse(gen_frames(student_id, exam_id), 
-                                 content_type="multipart/x-mixed-replace; boundary=frame")
+    student_id = await request.session.aget("student_id")
+    exam_id = await request.session.aget("exam_id")
 
+    # Only an open attempt gets a camera and a detection pipeline
+    if student_id is None or exam_id is None:
+        return HttpResponseForbidden()
+    open_attempt = ExamAssignment.objects.filter(student_id=student_id, exam_id=exam_id, submitted=False)
+    if not await open_attempt.aexists():
+        raise Http404
 
+    # Under ASGI stream from the async generator; a sync generator would
+    # pin a thread per candidate. WSGI servers can only consume sync ones.
+    if isinstance(request, ASGIRequest):
+        frames = agen_frames(student_id, exam_id)
+    else:
+        frames = gen_frames(student_id, exam_id)
+    return StreamingHttpResponse(frames, content_type="multipart/x-mixed-replace; boundary=frame")
 
-from django.db.models import Count
 
-# In your views.py
 
-from django.db.models import Count
+# ===========================================================
+#                    INVIGILATOR LIVE WALL
+# ===========================================================
 
-from django.db.models import Count
-from .models import WarningLog, Result
+@login_required
+def live_wall(request, exam_id):
+    if request.user.role != "TEACHER":
+        return redirect("login")
 
-import json
-from django.db.models import Count
-from .models import WarningLog, Result
+    exam = get_object_or_404(Exam, id=exam_id, teacher=request.user)
+    students = dict(
+        ExamAssignment.objects
+        .filter(exam=exam)
+        .values_list("student_id", "student__username")
+    )
+
+    return render(request, "live_wall.html", {
+        "exam": exam,
+        "students": {str(k): v for k, v in students.items()},
+    })
+
+
+# ===========================================================
+#                    TEACHER INTEGRITY LOGS
+# ===========================================================
+
+INTEGRITY_LOGS_PER_PAGE = 25
 
-import json
-from django.db.models import Count
-from django.shortcuts import render, redirect
-from django.contrib.auth.decorators import login_required
-from .models import WarningLog, Result
 
 @login_required
 def all_integrity_logs(request):
     if request.user.role != "TEACHER":
         return redirect("login")
 
-    # 1. Group WarningLogs by Student and Exam
+    # 1. Group WarningLogs by Student and Exam, one page at a time
     raw_summary = WarningLog.objects.filter(exam__teacher=request.user) \
         .values('student__username', 'exam__title', 'student_id', 'exam_id') \
         .annotate(log_count=Count('id')) \
-        .order_by('-log_count')
-
-    summary_logs = []
-    for entry in raw_summary:
-        # 2. Fetch specific logs for the popup timeline
-        session_logs = WarningLog.objects.filter(
-            student_id=entry['student_id'], 
-            exam_id=entry['exam_id']
-        ).order_by('timestamp')
-        
-        log_details = [
-            {
-                'object': str(log.object_name), 
-                'time': log.timestamp.strftime("%H:%M:%S")
-            } for log in session_logs
-        ]
-        
-        # 3. Fetch the student's score
-        result = Result.objects.filter(
-            student_id=entry['student_id'], 
-            exam_id=entry['exam_id']
-        ).first()
-        
-        summary_logs.append({
-            'student_name': entry['student__username'],
-            'exam_title': entry['exam__title'],
-            'log_count': entry['log_count'],
-            'score': result.score if result else "N/A",
-            'details_json': json.dumps(log_details) # Prepared for JS
-        })
+        .order_by('-log_count', 'student_id', 'exam_id')
+
+    page = Paginator(raw_summary, INTEGRITY_LOGS_PER_PAGE).get_page(request.GET.get("page"))
+    entries = list(page)
+
+    # 2. One Result lookup for the whole page, keyed by (student, exam)
+    scores = {}
+    if entries:
+        results = Result.objects.filter(
+            student_id__in={e['student_id'] for e in entries},
+            exam_id__in={e['exam_id'] for e in entries},
+        ).values_list('student_id', 'exam_id', 'score')
+        scores = {(student_id, exam_id): score for student_id, exam_id, score in results}
+
+    # 3. Timelines are fetched per row from integrity_log_timeline
+    summary_logs = [{
+        'student_name': entry['student__username'],
+        'exam_title': entry['exam__title'],
+        'log_count': entry['log_count'],
+        'score': scores.get((entry['student_id'], entry['exam_id']), "N/A"),
+        'timeline_url': reverse('integrity_log_timeline', args=[entry['exam_id'], entry['student_id']]),
+    } for entry in entries]
 
     return render(request, "all_integrity_logs.html", {
-        "summary_logs": summary_logs
-    })
\ No newline at end of file
+        "summary_logs": summary_logs,
+        "page_obj": page,
+        "total_logs_count": WarningLog.objects.filter(exam__teacher=request.user).count(),
+    })
+
+
+@login_required
+def integrity_log_timeline(request, exam_id, student_id):
+    if request.user.role != "TEACHER":
+        return JsonResponse({"error": "forbidden"}, status=403)
+
+    # One ordered scan of this attempt's logs
+    logs = WarningLog.objects.filter(
+        exam_id=exam_id,
+        exam__teacher=request.user,
+        student_id=student_id,
+    ).order_by('timestamp').values_list('object_name', 'warning_type', 'timestamp', 'ended_at', 'evidence')
+
+    return JsonResponse({
+        "timeline": [{
+            'object': object_name,
+            'warning_type': warning_type,
+            'time': timezone.localtime(timestamp).strftime("%H:%M:%S"),
+            'duration': round((ended_at - timestamp).total_seconds()) if ended_at else None,
+            'evidence_url': reverse('evidence_snapshot', args=[evidence]) if evidence else None,
+        } for object_name, warning_type, timestamp, ended_at, evidence in logs]
+    })
+
+
+@login_required
+def evidence_snapshot(request, digest):
+    if request.user.role != "TEACHER":
+        return HttpResponseForbidden()
+
+    # Content-addressed, so a digest the teacher may see never changes
+    if not DIGEST_RE.match(digest) or not WarningLog.objects.filter(
+        evidence=digest, exam__teacher=request.user
+    ).exists():
+        raise Http404
+
+    headers = {"Cache-Control": "private, max-age=31536000, immutable", "ETag": f'"{digest}"'}
+    if request.headers.get("If-None-Match") == headers["ETag"]:
+        return HttpResponseNotModified(headers=headers)
+
+    try:
+        response = FileResponse(open(evidence_store.path(digest), "rb"), content_type="image/jpeg")
+    except FileNotFoundError:
+        raise Http404
+    for name, value in headers.items():
+        response[name] = value
+    return response
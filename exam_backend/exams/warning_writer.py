@@ -0,0 +1,275 @@
+# ========================= IMPORTS =========================
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone as dt_timezone
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import DateTimeField, F, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .consumers import warning_group_name
+from .metrics import WARNING_WRITE_SECONDS, WARNINGS_WRITTEN
+from .models import MAX_WARNINGS, ExamAssignment, WarningClassCount, WarningLog
+
+logger = logging.getLogger(__name__)
+
+
+# ===========================================================
+#                  BACKGROUND WARNING WRITER
+# ===========================================================
+
+class WarningWriter:
+    """
+    Frame loops push detections onto an in-process queue and return
+    immediately. A background thread drains the queue, bulk-inserts the
+    WarningLog rows and folds them into the assignment's aggregates:
+    one F() update per (student, exam) and one per object class.
+
+    Once a flush commits, each affected candidate's WebSocket group gets
+    the new warnings and the updated total. A batch is written in one
+    transaction, so a failed flush (e.g. "database is locked") leaves
+    nothing behind and is retried up to ``retries`` times before it is
+    dropped.
+    """
+
+    def __init__(self, flush_interval_ms=500, max_batch=500, retries=3, retry_backoff_ms=200):
+        self.flush_interval = max(1, flush_interval_ms) / 1000.0
+        self.max_batch = max(1, int(max_batch))
+        self.retries = max(1, int(retries))
+        self.retry_backoff = max(0, retry_backoff_ms) / 1000.0
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+    # ---------------- public API ----------------
+
+    def enqueue(self, student_id, exam_id, object_name, warning_type, weight=1,
+                seen_at=None, incident_key="", peak_confidence=None):
+        """
+        Queue one warning. ``weight`` is how many warnings it counts towards
+        the limit; ``seen_at`` is the detection time as epoch seconds.
+        """
+        self.start()
+        seen_at = _as_datetime(seen_at) if seen_at is not None else timezone.now()
+        self._queue.put((
+            "log", student_id, exam_id, object_name, warning_type, weight,
+            seen_at, incident_key, peak_confidence,
+        ))
+
+    def end_incident(self, incident_key, ended_at, peak_confidence):
+        """Record the end of a tracked incident logged with ``incident_key``."""
+        self.start()
+        self._queue.put(("end", incident_key, _as_datetime(ended_at), peak_confidence))
+
+    def attach_evidence(self, incident_key, digest):
+        """Point the warning logged with ``incident_key`` at its snapshot."""
+        self.start()
+        self._queue.put(("evidence", incident_key, digest))
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="warning-writer", daemon=True
+                )
+                self._thread.start()
+
+    def flush(self):
+        """Synchronously write everything currently queued."""
+        items = []
+        while True:
+            try:
+                items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if items:
+            self._write_batch(items)
+
+    # ---------------- worker loop ----------------
+
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+
+            while len(items) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._write_batch(items)
+
+    def _write_batch(self, items):
+        for attempt in range(1, self.retries + 1):
+            try:
+                self._write(items)
+                return True
+            except Exception:
+                if attempt == self.retries:
+                    logger.exception("Dropped %d warning log(s) after %d attempts", len(items), attempt)
+                    return False
+                logger.warning("Warning log flush failed (attempt %d); retrying", attempt, exc_info=True)
+                time.sleep(self.retry_backoff * attempt)
+
+    def _write(self, items):
+        with self._flush_lock:
+            close_old_connections()
+
+            logs = []
+            # (student_id, exam_id) -> object_name -> [count, first_seen, last_seen, weight]
+            sessions = defaultdict(dict)
+            # (student_id, exam_id) -> warnings to push to that candidate
+            events = defaultdict(list)
+            # (incident_key, ended_at, peak_confidence)
+            endings = []
+            # (incident_key, evidence digest)
+            snapshots = []
+
+            for item in items:
+                if item[0] == "end":
+                    endings.append(item[1:])
+                    continue
+                if item[0] == "evidence":
+                    snapshots.append(item[1:])
+                    continue
+
+                _, student_id, exam_id, object_name, warning_type, weight, seen_at, incident_key, peak = item
+                logs.append(WarningLog(
+                    student_id=student_id,
+                    exam_id=exam_id,
+                    object_name=object_name,
+                    warning_type=warning_type,
+                    timestamp=seen_at,
+                    incident_key=incident_key,
+                    peak_confidence=peak,
+                ))
+
+                stats = sessions[(student_id, exam_id)].setdefault(
+                    object_name, [0, seen_at, seen_at, 0]
+                )
+                stats[0] += 1
+                stats[2] = seen_at
+                stats[3] += weight
+
+                events[(student_id, exam_id)].append({
+                    "object_name": object_name,
+                    "warning_type": warning_type,
+                    "timestamp": timezone.localtime(seen_at).strftime("%H:%M:%S"),
+                })
+
+            totals = {}
+            with WARNING_WRITE_SECONDS.time(), transaction.atomic():
+                WarningLog.objects.bulk_create(logs)
+                for key, classes in sessions.items():
+                    totals[key] = self._update_aggregates(*key, classes)
+                for incident_key, ended_at, peak in endings:
+                    WarningLog.objects.filter(incident_key=incident_key).update(
+                        ended_at=ended_at, peak_confidence=peak
+                    )
+                # Queued after their log, so the row exists by now
+                for incident_key, digest in snapshots:
+                    WarningLog.objects.filter(incident_key=incident_key).update(evidence=digest)
+
+            WARNINGS_WRITTEN.inc(amount=len(logs))
+
+            for key, warnings in events.items():
+                if totals.get(key) is not None:
+                    self._publish(*key, warnings, totals[key])
+
+    def _publish(self, student_id, exam_id, warnings, total_count):
+        channel_layer = get_channel_layer()
+        if channel_layer is None:
+            return
+
+        try:
+            async_to_sync(channel_layer.group_send)(
+                warning_group_name(student_id, exam_id),
+                {
+                    "type": "send_warning",
+                    "warnings": warnings,
+                    "total_count": total_count,
+                    "should_submit": total_count >= MAX_WARNINGS,
+                },
+            )
+        except Exception:
+            # Polling still picks the warnings up from the database
+            logger.exception("Could not push warnings for student %s exam %s", student_id, exam_id)
+
+    def _update_aggregates(self, student_id, exam_id, classes):
+        assignment_id = (
+            ExamAssignment.objects
+            .filter(student_id=student_id, exam_id=exam_id)
+            .values_list("id", flat=True)
+            .first()
+        )
+        if assignment_id is None:
+            return None
+
+        first_seen = min(stats[1] for stats in classes.values())
+        last_seen = max(stats[2] for stats in classes.values())
+
+        ExamAssignment.objects.filter(id=assignment_id).update(
+            warning_count=F("warning_count") + sum(stats[3] for stats in classes.values()),
+            first_warning_at=Coalesce(
+                "first_warning_at", Value(first_seen, output_field=DateTimeField())
+            ),
+            last_warning_at=last_seen,
+        )
+
+        # Make sure a row exists for every class, then bump it atomically
+        WarningClassCount.objects.bulk_create(
+            [
+                WarningClassCount(
+                    assignment_id=assignment_id,
+                    object_name=object_name,
+                    first_seen=first,
+                    last_seen=last,
+                )
+                for object_name, (_, first, last, _) in classes.items()
+            ],
+            ignore_conflicts=True,
+        )
+        for object_name, (count, _, last, _) in classes.items():
+            WarningClassCount.objects.filter(
+                assignment_id=assignment_id, object_name=object_name
+            ).update(count=F("count") + count, last_seen=last)
+
+        return (
+            ExamAssignment.objects
+            .filter(id=assignment_id)
+            .values_list("warning_count", flat=True)
+            .first()
+        )
+
+
+def _as_datetime(epoch_seconds):
+    return datetime.fromtimestamp(epoch_seconds, tz=dt_timezone.utc)
+
+
+warning_writer = WarningWriter(
+    flush_interval_ms=getattr(settings, "WARNING_WRITER_FLUSH_INTERVAL_MS", 500),
+    max_batch=getattr(settings, "WARNING_WRITER_MAX_BATCH", 500),
+    retries=getattr(settings, "WARNING_WRITER_RETRIES", 3),
+    retry_backoff_ms=getattr(settings, "WARNING_WRITER_RETRY_BACKOFF_MS", 200),
+)
+
+# Don't lose detections still sitting in the queue on shutdown
+atexit.register(warning_writer.flush)